@@ -0,0 +1,101 @@
+import functools
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+STREAM_END = object()
+
+
+def call_view(view, request, *args, **kwargs):
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def next_chunk(chunks):
+    return next(chunks, STREAM_END)
+
+
+async def stream_in_thread(chunks):
+    # ASGI-обработчик Django 3.2 перебирает потоковый ответ прямо в цикле
+    # событий, где обращаться к базе нельзя. Каждая порция вычитывается в
+    # потоке, и все порции одного ответа — в одном и том же: курсор
+    # выборки привязан к соединению потока, который его открыл.
+    async with ThreadSensitiveContext():
+        pull = sync_to_async(next_chunk, thread_sensitive=True)
+        try:
+            while True:
+                chunk = await pull(chunks)
+                if chunk is STREAM_END:
+                    break
+                yield chunk
+        finally:
+            await sync_to_async(
+                close_old_connections,
+                thread_sensitive=True,
+            )()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    async def send_response(self, response, send):
+        if not getattr(response, 'stream_in_thread', False):
+            return await super().send_response(response, send)
+        # Порции берутся только здесь, когда middleware уже обернули
+        # streaming_content.
+        chunks = stream_in_thread(iter(response.streaming_content))
+        response.streaming_content = ()
+
+        # Заголовки и завершающее сообщение отправляет Django, тело ответа
+        # передаётся перед завершающим сообщением.
+        async def send_with_body(message):
+            if message['type'] == 'http.response.body':
+                async for chunk in chunks:
+                    for part, _ in self.chunk_bytes(chunk):
+                        await send({
+                            'type': 'http.response.body',
+                            'body': part,
+                            'more_body': True,
+                        })
+            await send(message)
+
+        try:
+            await super().send_response(response, send_with_body)
+        finally:
+            await chunks.aclose()
+
+
+def run_in_thread_pool(view):
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        # Чтение выполняется в общем пуле потоков (thread_sensitive=False),
+        # а не в единственном потоке, куда Django по умолчанию отправляет
+        # все синхронные представления под ASGI. Запись, в том числе
+        # POST/PATCH/DELETE того же ViewSet, остаётся в этом потоке, как и
+        # без обёртки.
+        response = await sync_to_async(
+            call_view,
+            thread_sensitive=request.method not in SAFE_METHODS,
+        )(view, request, *args, **kwargs)
+        # Выборка для потокового ответа ленивая: запрос к базе выполнится
+        # уже при чтении первой порции.
+        response.stream_in_thread = response.streaming
+        return response
+
+    return async_view
+
+
+def make_async(urlpatterns, views):
+    if not getattr(settings, 'ASYNC_READ_VIEWS', False):
+        return urlpatterns
+    for pattern in urlpatterns:
+        callback = getattr(pattern, 'callback', None)
+        if getattr(callback, 'cls', None) in views:
+            pattern.callback = run_in_thread_pool(callback)
+    return urlpatterns
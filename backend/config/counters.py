@@ -0,0 +1,20 @@
+class CounterFieldsMixin:
+    # Денормализованные счётчики меняются только через UPDATE с F(): при
+    # обычном сохранении уже загруженного объекта они не записываются,
+    # иначе устаревшее значение из памяти затрёт параллельное изменение.
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and not self._state.adding
+            and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,57 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+REQUESTS = Counter(
+    'fdgrm_http_requests_total',
+    'Количество обработанных запросов.',
+    ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'fdgrm_http_request_duration_seconds',
+    'Время обработки запроса.',
+    ['view', 'method'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    ),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'fdgrm_http_requests_in_flight',
+    'Количество запросов, обрабатываемых в данный момент.',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'fdgrm_db_queries_per_request',
+    'Количество SQL-запросов на один запрос к API.',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+DB_DURATION = Histogram(
+    'fdgrm_db_duration_seconds_per_request',
+    'Суммарное время SQL-запросов на один запрос к API.',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'fdgrm_cache_requests_total',
+    'Обращения к кэшам приложения.',
+    ['namespace', 'outcome'],
+)
+
+
+def get_registry():
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import (  # isort: skip
+    DB_DURATION, DB_QUERIES, REQUEST_LATENCY, REQUESTS, REQUESTS_IN_FLIGHT)
+
+logger = logging.getLogger('config.slow_requests')
+# Таймеры текущего запроса. Контекст копируется в потоки sync_to_async,
+# поэтому запросы считаются и тогда, когда представление выполняется не в
+# том потоке, где работает middleware (ASGI).
+active_timers = ContextVar('active_query_timers', default=())
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.statements = Counter()
+
+    def add(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+        self.statements[sql] += 1
+
+    def repeated(self, limit):
+        return [
+            {'sql': sql[:500], 'count': count}
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+def observe_query(execute, sql, params, many, context):
+    timers = active_timers.get()
+    if not timers:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for timer in timers:
+            timer.add(sql, duration)
+
+
+def install_query_observer(connection, **kwargs):
+    if observe_query not in connection.execute_wrappers:
+        # В начало списка: connection.execute_wrapper() снимает свою
+        # обёртку через pop() и не должен задеть эту.
+        connection.execute_wrappers.insert(0, observe_query)
+
+
+connection_created.connect(install_query_observer)
+
+
+@contextmanager
+def track_queries(timer):
+    for connection in connections.all():
+        install_query_observer(connection)
+    token = active_timers.set(active_timers.get() + (timer,))
+    try:
+        yield timer
+    finally:
+        active_timers.reset(token)
+
+
+def track_stream(chunks, timer, on_close):
+    # Таймер включается на чтение каждой порции отдельно: под ASGI порции
+    # читаются в потоке пула, и контекст у каждого чтения свой.
+    chunks = iter(chunks)
+    try:
+        while True:
+            with track_queries(timer):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        on_close()
+
+
+def view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else 'unresolved'
+
+
+class HybridMiddleware(MiddlewareMixin):
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timer, state = self.start(request)
+        try:
+            with track_queries(timer):
+                response = self.get_response(request)
+        finally:
+            self.release(request)
+        return self.finish(request, response, timer, state)
+
+    async def __acall__(self, request):
+        timer, state = self.start(request)
+        try:
+            with track_queries(timer):
+                response = await self.get_response(request)
+        finally:
+            self.release(request)
+        return self.finish(request, response, timer, state)
+
+    def release(self, request):
+        pass
+
+
+class RequestTimingMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def start(self, request):
+        request._timing = {'view_started': None, 'view_finished': None}
+        return QueryTimer(), time.perf_counter()
+
+    def finish(self, request, response, timer, started):
+        finished = time.perf_counter()
+        timing = self.collect(request._timing, timer, started, finished)
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration:.1f}' + (f';desc="{desc}"' if desc else '')
+            for name, duration, desc in (
+                ('db', timing['db_ms'], f'{timer.count} queries'),
+                ('view', timing['view_ms'], None),
+                ('render', timing['render_ms'], None),
+                ('total', timing['total_ms'], None),
+            )
+        )
+        if not response.streaming:
+            self.report(request, response, timing, timer)
+            return response
+        # Тело потокового ответа (выгрузка списка покупок) выполняет запросы
+        # уже после выхода из middleware. Заголовок Server-Timing к этому
+        # моменту отправлен и описывает только работу до тела, а проверка
+        # на медленный запрос ждёт, пока тело не будет дочитано, и учитывает
+        # его запросы и время как render.
+        if request._timing['view_finished'] is None:
+            request._timing['view_finished'] = finished
+
+        def report_stream():
+            self.report(
+                request,
+                response,
+                self.collect(
+                    request._timing,
+                    timer,
+                    started,
+                    time.perf_counter(),
+                ),
+                timer,
+            )
+
+        response.streaming_content = track_stream(
+            response.streaming_content,
+            timer,
+            report_stream,
+        )
+        return response
+
+    def report(self, request, response, timing, timer):
+        if (
+            timing['total_ms'] >= settings.REQUEST_TIMING_SLOW_MS
+            or timer.count >= settings.REQUEST_TIMING_SLOW_QUERIES
+        ):
+            self.log_slow_request(request, response, timing, timer)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._timing['view_finished'] = time.perf_counter()
+        return response
+
+    def collect(self, marks, timer, started, finished):
+        view_started = marks['view_started'] or started
+        view_finished = marks['view_finished'] or finished
+        return {
+            'queries': timer.count,
+            'db_ms': timer.duration * 1000,
+            'view_ms': (view_finished - view_started) * 1000,
+            'render_ms': (finished - view_finished) * 1000,
+            'total_ms': (finished - started) * 1000,
+        }
+
+    def log_slow_request(self, request, response, timing, timer):
+        user = getattr(request, 'user', None)
+        entry = {
+            'route': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'params': request.GET.dict(),
+            'status': response.status_code,
+            'user': user.pk if user is not None else None,
+            **{
+                key: round(value, 1) if isinstance(value, float) else value
+                for key, value in timing.items()
+            },
+            'repeated_sql': timer.repeated(
+                settings.REQUEST_TIMING_REPEATED_SQL,
+            ),
+        }
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+class MetricsMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def start(self, request):
+        REQUESTS_IN_FLIGHT.inc()
+        return QueryTimer(), time.perf_counter()
+
+    def release(self, request):
+        REQUESTS_IN_FLIGHT.dec()
+
+    def finish(self, request, response, timer, started):
+        view = view_name(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(
+            time.perf_counter() - started
+        )
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        DB_QUERIES.labels(view).observe(timer.count)
+        DB_DURATION.labels(view).observe(timer.duration)
+        return response
@@ -1,7 +1,90 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
 
 
 class ModifiedPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
+
+
+class ModifiedCursorPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class RecipeCursorPagination(ModifiedCursorPagination):
+    ordering = ('-created', 'id')
+
+
+class TimelineCursorPagination(ModifiedCursorPagination):
+    ordering = ('-created', 'recipe_id')
+
+
+class IdCursorPagination(ModifiedCursorPagination):
+    ordering = ('id', )
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    cursor_pagination_class = IdCursorPagination
+    page_number_pagination_class = ModifiedPageNumberPagination
+    # Параметры, задающие собственный порядок выдачи (курсор его бы сбросил).
+    ordering_query_params = ()
+
+    def get_paginator(self, request):
+        # Постраничная выдача со счётчиком остаётся по умолчанию; курсор
+        # включается явным ?cursor= (пустое значение — первая страница).
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        page_query_params = (
+            self.page_number_pagination_class.page_query_param,
+            *self.ordering_query_params,
+        )
+        if cursor_query_param not in request.query_params or any(
+            param in request.query_params for param in page_query_params
+        ):
+            return self.page_number_pagination_class()
+        return self.cursor_pagination_class()
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_paginators(self):
+        return (
+            self.cursor_pagination_class(),
+            self.page_number_pagination_class(),
+        )
+
+    def get_schema_fields(self, view):
+        fields = {}
+        for paginator in self.get_paginators():
+            for field in paginator.get_schema_fields(view):
+                fields.setdefault(field.name, field)
+        return list(fields.values())
+
+    def get_schema_operation_parameters(self, view):
+        parameters = {}
+        for paginator in self.get_paginators():
+            for parameter in paginator.get_schema_operation_parameters(view):
+                parameters.setdefault(parameter['name'], parameter)
+        return list(parameters.values())
+
+
+class RecipePagination(CursorOrPageNumberPagination):
+    cursor_pagination_class = RecipeCursorPagination
+    ordering_query_params = ('search', 'ordering', )
+
+
+class IdPagination(CursorOrPageNumberPagination):
+    cursor_pagination_class = IdCursorPagination
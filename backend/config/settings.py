@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.MetricsMiddleware',
+    'config.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +74,23 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default=''),
+    }
+}
+CATALOG_CACHE_TIMEOUT = int(
+    os.environ.get('CATALOG_CACHE_TIMEOUT', default=60 * 60)
+)
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', default=60))
+MEMBERSHIP_CACHE_TIMEOUT = int(
+    os.environ.get('MEMBERSHIP_CACHE_TIMEOUT', default=60 * 10)
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,6 +119,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+RECIPE_IMAGE_FORMAT = os.environ.get('RECIPE_IMAGE_FORMAT', default='WEBP')
+RECIPE_IMAGE_QUALITY = int(os.environ.get('RECIPE_IMAGE_QUALITY', default=75))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -109,21 +130,63 @@ EMAIL_HOST = os.environ.get('EMAIL_HOST')
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = os.environ.get('EMAIL_PORT')
+EMAIL_QUEUE_BATCH_SIZE = int(os.environ.get('EMAIL_QUEUE_BATCH_SIZE', default=50))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(
+    os.environ.get('EMAIL_QUEUE_MAX_ATTEMPTS', default=5)
+)
+EMAIL_QUEUE_RETRY_DELAY_SECONDS = int(
+    os.environ.get('EMAIL_QUEUE_RETRY_DELAY_SECONDS', default=60)
+)
+EMAIL_QUEUE_LEASE_SECONDS = int(
+    os.environ.get('EMAIL_QUEUE_LEASE_SECONDS', default=300)
+)
+
+FEED_FANOUT_LIMIT = int(os.environ.get('FEED_FANOUT_LIMIT', default=10000))
+FEED_BACKFILL_SIZE = int(os.environ.get('FEED_BACKFILL_SIZE', default=100))
+
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', default='') == 'True'
+
+BULK_ACTION_LIMIT = int(os.environ.get('BULK_ACTION_LIMIT', default=100))
+
+REQUEST_TIMING_ENABLED = (
+    os.environ.get('REQUEST_TIMING_ENABLED', default='') == 'True'
+)
+REQUEST_TIMING_SLOW_MS = int(
+    os.environ.get('REQUEST_TIMING_SLOW_MS', default=500)
+)
+REQUEST_TIMING_SLOW_QUERIES = int(
+    os.environ.get('REQUEST_TIMING_SLOW_QUERIES', default=50)
+)
+REQUEST_TIMING_REPEATED_SQL = int(
+    os.environ.get('REQUEST_TIMING_REPEATED_SQL', default=5)
+)
+
+METRICS_ENABLED = (
+    os.environ.get('METRICS_ENABLED', default='True') == 'True'
+)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+INGREDIENT_SEARCH_LIMIT = int(
+    os.environ.get('INGREDIENT_SEARCH_LIMIT', default=20)
+)
+INGREDIENT_INDEX_TTL = int(os.environ.get('INGREDIENT_INDEX_TTL', default=300))
+INGREDIENT_SEARCH_TRIGRAM = (
+    os.environ.get('INGREDIENT_SEARCH_TRIGRAM', default='') == 'True'
+)
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
     'PERMISSIONS': {
-        'user': ['rest_framework.permissions.AllowAny'],
+        'user': ['users.permissions.CurrentUserOrAdminOrReadOnly'],
         'user_list': ['rest_framework.permissions.AllowAny'],
     },
     'PASSWORD_RESET_CONFIRM_URL': 'api/users/reset_password/confirm/{uid}/{token}',
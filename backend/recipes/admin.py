@@ -1,12 +1,63 @@
 from django.contrib import admin
-
-from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingList, Tag)
+from django.contrib.admin.widgets import AutocompleteSelect
+
+from config.paginators import EstimatedCountPaginator  # isort: skip
+from .images import image_replaced  # isort: skip
+from .models import (  # isort: skip
+    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag)
+from .search import search_ingredients  # isort: skip
+from .shopping_list import (  # isort: skip
+    amounts_diff, recipe_amounts, recipe_ingredients_changed)
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    def __init__(self, *args, preloaded=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preloaded = preloaded or {}
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(item) for item in value
+            if str(item) not in self.choices.field.empty_values
+        ]
+        if not all(item in self.preloaded for item in selected):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for item in selected:
+            options.append(self.create_option(
+                name,
+                item,
+                self.choices.field.label_from_instance(self.preloaded[item]),
+                set(selected),
+                len(options),
+            ))
+        return [(None, options, 0)]
 
 
 class IngredientInLine(admin.TabularInline):
     model = IngredientInRecipe
     extra = 1
+    autocomplete_fields = (
+        'ingredient',
+    )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        object_id = request.resolver_match.kwargs.get('object_id')
+        if db_field.name == 'ingredient' and object_id is not None:
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field,
+                self.admin_site,
+                using=kwargs.get('using'),
+                preloaded={
+                    str(ingredient.id): ingredient
+                    for ingredient in Ingredient.objects.filter(
+                        ingredient_in_recipe__recipe_id=object_id,
+                    )
+                },
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -14,24 +65,52 @@ class RecipeAdmin(admin.ModelAdmin):
         'name',
         'author',
         'cooking_time',
-        'in_favorites',
+        'favorites_count',
+        'in_carts_count',
+    )
+    readonly_fields = (
+        'favorites_count',
+        'in_carts_count',
     )
     list_display_links = (
         'name',
     )
+    list_select_related = (
+        'author',
+    )
+    list_filter = (
+        'tags',
+    )
     search_fields = (
         'name',
+        'author__email',
+        'author__username',
+    )
+    autocomplete_fields = (
         'author',
         'tags',
     )
     inlines = (
         IngredientInLine,
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-    def in_favorites(self, obj):
-        return obj.recipe_in_favorite.count()
+    def save_model(self, request, obj, form, change):
+        if change and 'image' in form.changed_data:
+            old_image = form.initial.get('image')
+            image_replaced(obj, getattr(old_image, 'name', old_image))
+        super().save_model(request, obj, form, change)
 
-    in_favorites.short_description = 'В избранном'
+    def save_related(self, request, form, formsets, change):
+        recipe = form.instance
+        before = recipe_amounts(recipe.id) if change else {}
+        super().save_related(request, form, formsets, change)
+        if change:
+            recipe_ingredients_changed(
+                recipe.id,
+                amounts_diff(before, recipe_amounts(recipe.id)),
+            )
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -59,6 +138,20 @@ class IngredientAdmin(admin.ModelAdmin):
     search_fields = (
         'name',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or request.resolver_match.url_name != (
+            'autocomplete'
+        ):
+            return super().get_search_results(
+                request,
+                queryset,
+                search_term,
+            )
+        found = search_ingredients(search_term, limit=100)
+        return queryset.filter(id__in=[item['id'] for item in found]), False
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -69,10 +162,20 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_display_links = (
         'user',
     )
+    list_select_related = (
+        'user',
+        'recipe',
+    )
     search_fields = (
+        'user__email',
+        'recipe__name',
+    )
+    autocomplete_fields = (
         'user',
         'recipe',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class ShoppingListAdmin(admin.ModelAdmin):
@@ -83,10 +186,20 @@ class ShoppingListAdmin(admin.ModelAdmin):
     list_display_links = (
         'user',
     )
+    list_select_related = (
+        'user',
+        'recipe',
+    )
     search_fields = (
+        'user__email',
+        'recipe__name',
+    )
+    autocomplete_fields = (
         'user',
         'recipe',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Recipe, RecipeAdmin)
@@ -4,3 +4,34 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from django.core.checks import Tags, register
+        from django.db.models import signals
+
+        from users.models import Follow  # isort: skip
+        from .cache import (bump_ingredients_version, bump_tags_version,
+                            check_shared_cache)
+        from .counters import COUNTERS_BY_SOURCE, counter_source_changed
+        from .feed import follow_changed, recipe_published
+        from .memberships import (KINDS_BY_MODEL, membership_added,
+                                  membership_removed)
+        from .models import Ingredient, Recipe, ShoppingList, Tag
+        from .search import install_sqlite_fts, invalidate_ingredient_index
+        from .shopping_list import cart_changed
+
+        for signal in (signals.post_save, signals.post_delete):
+            signal.connect(bump_tags_version, sender=Tag)
+            signal.connect(bump_ingredients_version, sender=Ingredient)
+            signal.connect(invalidate_ingredient_index, sender=Ingredient)
+            for model in COUNTERS_BY_SOURCE:
+                signal.connect(counter_source_changed, sender=model)
+            signal.connect(follow_changed, sender=Follow)
+        for model in KINDS_BY_MODEL:
+            signals.post_save.connect(membership_added, sender=model)
+            signals.post_delete.connect(membership_removed, sender=model)
+        signals.post_save.connect(recipe_published, sender=Recipe)
+        signals.post_save.connect(cart_changed, sender=ShoppingList)
+        signals.pre_delete.connect(cart_changed, sender=ShoppingList)
+        signals.post_migrate.connect(install_sqlite_fts, sender=self)
+        register(check_shared_cache, Tags.caches, deploy=True)
@@ -0,0 +1,188 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from rest_framework.response import Response
+
+from .counters import counter_sources_changed  # isort: skip
+from .feed import backfill_timelines, drop_timelines  # isort: skip
+from .memberships import (  # isort: skip
+    FOLLOWING, SHOPPING_CART, SOURCES, forget_membership)
+from .models import Recipe  # isort: skip
+from .serializers import BulkIdsSerializer  # isort: skip
+from .shopping_list import add_recipes, remove_recipes  # isort: skip
+
+User = get_user_model()
+
+CREATED = 'created'
+EXISTS = 'exists'
+DELETED = 'deleted'
+MISSING = 'missing'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+def find_targets(user, kind, ids):
+    if kind == FOLLOWING:
+        return User.objects.exclude(pk=user.pk).only(
+            'id',
+            'followers_count',
+        ).in_bulk(ids)
+    return Recipe.objects.only('id').in_bulk(ids)
+
+
+def target_status(user, kind, pk, targets):
+    if kind == FOLLOWING and pk == user.pk:
+        return SELF
+    return MISSING if pk in targets else NOT_FOUND
+
+
+def members_changed(user, kind, instances, targets, add):
+    if not instances:
+        return
+    model, field = SOURCES[kind]
+    ids = {getattr(instance, field) for instance in instances}
+    forget_membership(user, kind)
+    counter_sources_changed(model, instances, 1 if add else -1)
+    if kind == SHOPPING_CART:
+        (add_recipes if add else remove_recipes)(user.pk, ids)
+    elif kind == FOLLOWING and add:
+        backfill_timelines(user.pk, [targets[pk] for pk in ids])
+    elif kind == FOLLOWING:
+        drop_timelines(user.pk, ids)
+
+
+def supports_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    return (
+        connection.vendor == 'sqlite'
+        and connection.Database.sqlite_version_info >= (3, 35)
+    )
+
+
+def member_columns(model, field):
+    quote = connection.ops.quote_name
+    return (
+        quote(model._meta.db_table),
+        quote(model._meta.get_field('user').column),
+        quote(model._meta.get_field(field).column),
+    )
+
+
+def execute(sql, params, returning):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()] if returning else None
+
+
+def insert_members(user, kind, pks):
+    # Созданными считаются только строки, которые вставил этот запрос:
+    # строки, добавленные параллельным запросом, их последствия уже
+    # применили, и повторно учитывать их нельзя.
+    model, field = SOURCES[kind]
+    if not pks:
+        return set()
+    if not supports_returning():
+        inserted = set()
+        for pk in pks:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([
+                        model(user=user, **{field: pk}),
+                    ])
+            except IntegrityError:
+                continue
+            inserted.add(pk)
+        return inserted
+    table, user_column, column = member_columns(model, field)
+    return set(execute(
+        f'INSERT INTO {table} ({user_column}, {column}) '
+        f'VALUES {", ".join(["(%s, %s)"] * len(pks))} '
+        f'ON CONFLICT DO NOTHING RETURNING {column}',
+        [value for pk in pks for value in (user.pk, pk)],
+        returning=True,
+    ))
+
+
+def delete_members(user, kind, pks):
+    model, field = SOURCES[kind]
+    if not pks:
+        return set()
+    # Строки удаляются одним DELETE без сигналов: их последствия
+    # (счётчики, кэши, ленты, список покупок) применяются пачкой.
+    table, user_column, column = member_columns(model, field)
+    sql = (
+        f'DELETE FROM {table} WHERE {user_column} = %s '
+        f'AND {column} IN ({", ".join(["%s"] * len(pks))})'
+    )
+    params = [user.pk, *pks]
+    if supports_returning():
+        return set(execute(f'{sql} RETURNING {column}', params, True))
+    locked = list(
+        model.objects.select_for_update().filter(
+            user=user,
+            **{f'{field}__in': pks},
+        ).values_list(field, flat=True)
+    )
+    execute(sql, params, returning=False)
+    return set(locked)
+
+
+def member_instances(user, kind, pks):
+    model, field = SOURCES[kind]
+    return [model(user=user, **{field: pk}) for pk in pks]
+
+
+@transaction.atomic
+def add_members(user, kind, ids):
+    targets = find_targets(user, kind, ids)
+    created = insert_members(user, kind, list(targets))
+    members_changed(
+        user,
+        kind,
+        member_instances(user, kind, created),
+        targets,
+        add=True,
+    )
+    return {
+        pk: (
+            CREATED if pk in created
+            else EXISTS if pk in targets
+            else target_status(user, kind, pk, targets)
+        )
+        for pk in ids
+    }
+
+
+@transaction.atomic
+def remove_members(user, kind, ids):
+    deleted = delete_members(user, kind, ids)
+    members_changed(
+        user,
+        kind,
+        member_instances(user, kind, deleted),
+        {},
+        add=False,
+    )
+    missing = [pk for pk in ids if pk not in deleted]
+    targets = find_targets(user, kind, missing) if missing else {}
+    return {
+        pk: (
+            DELETED if pk in deleted
+            else target_status(user, kind, pk, targets)
+        )
+        for pk in ids
+    }
+
+
+def bulk_members_response(request, kind):
+    serializer = BulkIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    performer = add_members if request.method == 'POST' else remove_members
+    outcomes = performer(request.user, kind, ids)
+    return Response({
+        'results': [
+            {'id': pk, 'status': outcomes[pk]}
+            for pk in ids
+        ],
+    })
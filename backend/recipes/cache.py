@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Warning
+from django.db import transaction
+
+from config.metrics import CACHE_REQUESTS  # isort: skip
+
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = Counter()
+
+    def add(self, namespace, outcome):
+        with self._lock:
+            self._counter[(namespace, outcome)] += 1
+        CACHE_REQUESTS.labels(namespace, outcome).inc()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counter)
+
+
+cache_stats = CacheStats()
+
+
+def version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    version = cache.get(version_key(namespace))
+    if version is not None:
+        return version
+    version = time.time_ns()
+    if cache.add(version_key(namespace), version, None):
+        return version
+    return cache.get(version_key(namespace), version)
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(version_key(namespace))
+    except ValueError:
+        cache.set(version_key(namespace), time.time_ns(), None)
+
+
+def get_or_build(namespace, suffix, build):
+    key = f'catalog:{namespace}:{get_version(namespace)}:{suffix}'
+    data = cache.get(key)
+    if data is not None:
+        cache_stats.add(namespace, 'hit')
+        return data
+    cache_stats.add(namespace, 'miss')
+    data = build()
+    cache.set(
+        key,
+        data,
+        getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60),
+    )
+    return data
+
+
+def bump_tags_version(*args, **kwargs):
+    transaction.on_commit(lambda: bump_version(TAGS))
+
+
+def bump_ingredients_version(*args, **kwargs):
+    transaction.on_commit(lambda: bump_version(INGREDIENTS))
+
+
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [
+        Warning(
+            'Кэш по умолчанию хранится в памяти процесса: инвалидация '
+            'справочников, отметок и токенов не дойдёт до других воркеров.',
+            hint=(
+                'Задайте общий кэш через CACHE_BACKEND и CACHE_LOCATION '
+                '(например, memcached из docker-compose).'
+            ),
+            id='recipes.W001',
+        ),
+    ]
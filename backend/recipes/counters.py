@@ -0,0 +1,77 @@
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save
+
+from users.models import Follow, User  # isort: skip
+from .models import Favorite, Recipe, ShoppingList  # isort: skip
+
+# (модель со счётчиком, поле счётчика, модель-источник, внешний ключ)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingList, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+COUNTERS_BY_SOURCE = {}
+for target, field, source, key in COUNTERS:
+    COUNTERS_BY_SOURCE.setdefault(source, []).append((target, field, key))
+
+
+def change_counter(model, pk, field, delta):
+    if pk is None or not delta:
+        return
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def counter_source_changed(sender, instance, created=True, **kwargs):
+    if not created:
+        return
+    delta = 1 if kwargs['signal'] is post_save else -1
+    for target, field, key in COUNTERS_BY_SOURCE[sender]:
+        change_counter(target, getattr(instance, f'{key}_id'), field, delta)
+
+
+def counter_sources_changed(sender, instances, delta):
+    for target, field, key in COUNTERS_BY_SOURCE[sender]:
+        pks_by_times = {}
+        for pk, times in Counter(
+            getattr(instance, f'{key}_id') for instance in instances
+        ).items():
+            pks_by_times.setdefault(times, []).append(pk)
+        for times, pks in pks_by_times.items():
+            target.objects.filter(pk__in=pks).update(
+                **{field: Greatest(F(field) + delta * times, 0)}
+            )
+
+
+def add_recipes_count(recipes):
+    for author_id, total in Counter(
+        recipe.author_id for recipe in recipes
+    ).items():
+        change_counter(User, author_id, 'recipes_count', total)
+
+
+def reconcile_counters(apps=global_apps):
+    fixed = {}
+    for target, field, source, key in COUNTERS:
+        target = apps.get_model(target._meta.label)
+        source = apps.get_model(source._meta.label)
+        actual = Coalesce(
+            Subquery(
+                source.objects.filter(
+                    **{key: OuterRef('pk')}
+                ).order_by().values(key).annotate(
+                    total=Count('pk'),
+                ).values('total')
+            ),
+            0,
+        )
+        fixed[f'{target._meta.label}.{field}'] = target.objects.exclude(
+            **{field: actual}
+        ).update(**{field: actual})
+    return fixed
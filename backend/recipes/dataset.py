@@ -0,0 +1,125 @@
+import random
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from users.models import Follow  # isort: skip
+from .counters import reconcile_counters  # isort: skip
+from .feed import rebuild_timelines  # isort: skip
+from .models import (  # isort: skip
+    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag)
+from .shopping_list import rebuild_shopping_lists  # isort: skip
+
+User = get_user_model()
+
+SEED_PASSWORD = 'seed-password'
+
+
+def seed_dataset(
+    recipes=1000,
+    users=50,
+    ingredients_per_recipe=6,
+    follows=20,
+    favorites=50,
+    cart=20,
+    random_seed=0,
+):
+    rng = random.Random(random_seed)
+    prefix = f'seed-{uuid.uuid4().hex[:8]}'
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create(
+        User(
+            username=f'{prefix}-{i}',
+            email=f'{prefix}-{i}@example.com',
+            first_name='Seed',
+            last_name=str(i),
+            password=password,
+        ) for i in range(users)
+    )
+    authors = list(User.objects.filter(username__startswith=prefix))
+    viewer = authors[0]
+
+    tags = list(Tag.objects.all())
+    if not tags:
+        Tag.objects.bulk_create(
+            Tag(name=slug, color='#000000', slug=slug)
+            for slug in ('breakfast', 'lunch', 'dinner')
+        )
+        tags = list(Tag.objects.all())
+    catalog = list(Ingredient.objects.values_list('id', flat=True))
+    if len(catalog) < ingredients_per_recipe:
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'{prefix}-{i}', measurement_unit='г')
+            for i in range(200)
+        )
+        catalog = list(Ingredient.objects.values_list('id', flat=True))
+
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f'{prefix}-{i}',
+                text='Рецепт для проверки производительности.',
+                image='images/seed.jpg',
+                cooking_time=rng.randint(5, 120),
+                author=rng.choice(authors),
+            ) for i in range(recipes)
+        ),
+        batch_size=1000,
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(name__startswith=prefix).values_list(
+            'id',
+            flat=True,
+        )
+    )
+    IngredientInRecipe.objects.bulk_create(
+        (
+            IngredientInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(catalog, ingredients_per_recipe)
+        ),
+        batch_size=1000,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.id)
+            for recipe_id in recipe_ids
+            for tag in rng.sample(tags, rng.randint(1, len(tags)))
+        ),
+        batch_size=1000,
+    )
+    for model, size in ((Favorite, favorites), (ShoppingList, cart)):
+        model.objects.bulk_create(
+            (
+                model(user=user, recipe_id=recipe_id)
+                for user in authors
+                for recipe_id in rng.sample(
+                    recipe_ids,
+                    min(size, len(recipe_ids)),
+                )
+            ),
+            batch_size=1000,
+        )
+    Follow.objects.bulk_create(
+        (
+            Follow(user=user, author=author)
+            for user in authors
+            for author in rng.sample(authors, min(follows, len(authors)))
+            if author != user
+        ),
+        batch_size=1000,
+    )
+    reconcile_counters()
+    rebuild_timelines()
+    rebuild_shopping_lists()
+    return {
+        'viewer': viewer,
+        'authors': authors,
+        'tags': tags,
+        'recipe_ids': recipe_ids,
+    }
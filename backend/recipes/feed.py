@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import post_save
+
+from users.models import Follow  # isort: skip
+from .models import Recipe, TimelineEntry  # isort: skip
+
+BATCH_SIZE = 1000
+
+
+def fanout_limit():
+    return getattr(settings, 'FEED_FANOUT_LIMIT', 10000)
+
+
+def is_fanned_out(author):
+    return author is not None and author.followers_count <= fanout_limit()
+
+
+def fan_out_recipes(recipes):
+    for recipe in recipes:
+        if not is_fanned_out(recipe.author):
+            continue
+        followers = Follow.objects.filter(
+            author_id=recipe.author_id,
+        ).values_list('user_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    user_id=user_id,
+                    recipe_id=recipe.id,
+                    author_id=recipe.author_id,
+                    created=recipe.created,
+                )
+                for user_id in followers.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def backfill_timeline(user_id, author):
+    if not is_fanned_out(author):
+        return
+    recipes = Recipe.objects.filter(author=author).order_by(
+        '-created',
+        'id',
+    ).values_list('id', 'created')[
+        :getattr(settings, 'FEED_BACKFILL_SIZE', 100)
+    ]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author.id,
+                created=created,
+            )
+            for recipe_id, created in recipes
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timelines(user_id, authors):
+    from users.utils import latest_recipes_by_authors  # isort: skip
+
+    authors = [author for author in authors if is_fanned_out(author)]
+    if not authors:
+        return
+    recipes = latest_recipes_by_authors(
+        authors,
+        getattr(settings, 'FEED_BACKFILL_SIZE', 100),
+    ).values_list('id', 'author_id', 'created')
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                created=created,
+            )
+            for recipe_id, author_id, created in recipes
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def drop_timelines(user_id, author_ids):
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        author_id__in=author_ids,
+    ).delete()
+
+
+def rebuild_timelines():
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.select_related('author').order_by('id')
+    for follow in follows.iterator():
+        backfill_timeline(follow.user_id, follow.author)
+
+
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        fan_out_recipes([instance])
+
+
+def follow_changed(sender, instance, created=True, **kwargs):
+    if not created:
+        return
+    if kwargs['signal'] is post_save:
+        backfill_timeline(instance.user_id, instance.author)
+    else:
+        drop_timelines(instance.user_id, [instance.author_id])
+
+
+def feed_queryset(user):
+    pulled_authors = list(
+        Follow.objects.filter(
+            user=user,
+            author__followers_count__gt=fanout_limit(),
+        ).values_list('author_id', flat=True)
+    )
+    if not pulled_authors:
+        return TimelineEntry.objects.filter(user=user), True
+    # Рецепты авторов с большим числом подписчиков не раскладываются по
+    # лентам при публикации, а подмешиваются при чтении.
+    return Recipe.objects.filter(
+        Q(Exists(TimelineEntry.objects.filter(
+            user=user,
+            recipe_id=OuterRef('pk'),
+        )))
+        | Q(author_id__in=pulled_authors)
+    ), False
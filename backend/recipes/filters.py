@@ -1,16 +1,40 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from .models import Ingredient, Recipe, Tag
+from .cache import TAGS, get_or_build
+from .models import Favorite, Ingredient, Recipe, ShoppingList, Tag
+from .search import search_recipes
 
 User = get_user_model()
 
+TAGS_ANY = 'any'
+TAGS_ALL = 'all'
+
+
+def tag_ids_by_slug():
+    return get_or_build(
+        TAGS,
+        'ids',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+    )
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids_by_slug()]
+
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='get_tags',
+    )
+    tags_mode = filters.ChoiceFilter(
+        choices=(
+            (TAGS_ANY, 'Любой из тэгов'),
+            (TAGS_ALL, 'Все тэги'),
+        ),
+        method='get_tags_mode',
     )
     is_favorited = filters.BooleanFilter(
         method='get_is_favorited'
@@ -18,28 +42,76 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(
+        method='get_search'
+    )
+    ordering = filters.ChoiceFilter(
+        choices=(
+            ('-favorites_count', 'Сначала популярные в избранном'),
+            ('-in_carts_count', 'Сначала популярные в списках покупок'),
+            ('-created', 'Сначала новые'),
+            ('created', 'Сначала старые'),
+        ),
+        method='get_ordering',
+    )
 
     class Meta:
         model = Recipe
         fields = (
             'author',
             'tags',
+            'tags_mode',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
+            'ordering',
+        )
+
+    def get_tags(self, queryset, name, value):
+        ids_by_slug = tag_ids_by_slug()
+        tag_ids = {ids_by_slug[slug] for slug in value}
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+        )
+        if self.form.cleaned_data.get('tags_mode') == TAGS_ALL:
+            for tag_id in tag_ids:
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag_id=tag_id))
+                )
+            return queryset
+        return queryset.filter(
+            Exists(recipe_tags.filter(tag_id__in=tag_ids))
         )
 
+    def get_tags_mode(self, queryset, name, value):
+        return queryset
+
     def get_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(recipe_in_favorite__user=user)
+            return queryset.filter(Exists(Favorite.objects.filter(
+                user=user,
+                recipe_id=OuterRef('pk'),
+            )))
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(recipe_in_shopping_list__user=user)
+            return queryset.filter(Exists(ShoppingList.objects.filter(
+                user=user,
+                recipe_id=OuterRef('pk'),
+            )))
         return queryset
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        if value.endswith('created'):
+            return queryset.order_by(value, 'id')
+        return queryset.order_by(value, '-created', 'id')
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(
@@ -0,0 +1,101 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from drf_base64.fields import Base64ImageField
+from PIL import Image, features
+from rest_framework import serializers
+
+THUMBNAIL = 'thumbnail'
+MEDIUM = 'medium'
+
+VARIANTS = {
+    THUMBNAIL: (320, 320),
+    MEDIUM: (960, 960),
+}
+
+
+def get_variant_format():
+    image_format = getattr(settings, 'RECIPE_IMAGE_FORMAT', 'WEBP')
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def variant_name(name, variant):
+    root, _ = os.path.splitext(name)
+    return f'{root}_{variant}.{get_variant_format().lower()}'
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(
+        buffer,
+        format=get_variant_format(),
+        quality=getattr(settings, 'RECIPE_IMAGE_QUALITY', 75),
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def generate_variants(recipe):
+    storage = recipe.image.storage
+    with recipe.image.open('rb') as original:
+        image = Image.open(original)
+        image.load()
+    for variant, size in VARIANTS.items():
+        name = variant_name(recipe.image.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(render_variant(image, size)))
+
+
+def delete_variants(storage, name):
+    for variant in VARIANTS:
+        variant_path = variant_name(name, variant)
+        if storage.exists(variant_path):
+            storage.delete(variant_path)
+
+
+def image_replaced(recipe, old_name):
+    recipe.image_variants_ready = False
+    recipe.image_variants_failed = False
+    if old_name:
+        storage = recipe.image.storage
+        transaction.on_commit(lambda: delete_variants(storage, old_name))
+
+
+class RecipeImageField(Base64ImageField):
+    def __init__(self, variant=None, list_variant=None, **kwargs):
+        self.variant = variant
+        self.list_variant = list_variant
+        super().__init__(**kwargs)
+
+    def get_variant(self):
+        parent = self.parent
+        if (
+            self.list_variant is not None
+            and isinstance(parent.parent, serializers.ListSerializer)
+        ):
+            return self.list_variant
+        return self.variant
+
+    def to_representation(self, value):
+        variant = self.get_variant()
+        if (
+            not value
+            or variant is None
+            or not getattr(value.instance, 'image_variants_ready', False)
+        ):
+            return super().to_representation(value)
+        url = value.storage.url(variant_name(value.name, variant))
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
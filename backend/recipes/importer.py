@@ -0,0 +1,279 @@
+import base64
+import binascii
+import json
+import posixpath
+import uuid
+from io import BytesIO
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, connection, transaction
+from PIL import Image
+from rest_framework.serializers import ValidationError
+
+from .counters import add_recipes_count  # isort: skip
+from .feed import fan_out_recipes  # isort: skip
+from .models import Ingredient, IngredientInRecipe, Recipe, Tag  # isort: skip
+from .serializers import INTEGER  # isort: skip
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 500
+# Допустимые типы data URI: расширение файла и формат, который должен
+# определить Pillow по самим байтам.
+IMAGE_TYPES = {
+    'image/jpeg': ('jpg', 'JPEG'),
+    'image/png': ('png', 'PNG'),
+    'image/gif': ('gif', 'GIF'),
+    'image/webp': ('webp', 'WEBP'),
+}
+# Уже загруженные изображения рецептов (upload_to поля Recipe.image).
+STORED_IMAGES_DIR = 'images/'
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(lines):
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            yield number, RowError(f'Некорректный JSON: {error}')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def positive_int(value, field):
+    # Как и в API: дробные значения и true/false отвергаются, а не
+    # округляются через int().
+    try:
+        number = INTEGER.to_internal_value(value)
+    except ValidationError:
+        raise RowError(f'{field}: должно быть целым числом.')
+    if number < 1:
+        raise RowError(f'{field}: должно быть больше 0.')
+    return number
+
+
+def stored_image(value, storage):
+    name = posixpath.normpath(value)
+    if name != value or not name.startswith(STORED_IMAGES_DIR):
+        raise RowError(
+            f'image: путь должен вести к файлу в {STORED_IMAGES_DIR}.'
+        )
+    try:
+        exists = storage.exists(name)
+    except SuspiciousFileOperation:
+        exists = False
+    if not exists:
+        raise RowError(f'image: файл {name} не найден.')
+    return name
+
+
+def decode_image(value):
+    header, separator, data = value.partition(';base64,')
+    image_type = IMAGE_TYPES.get(header[len('data:'):])
+    if not separator or image_type is None:
+        raise RowError(
+            'image: ожидается data URI с типом '
+            f'{", ".join(IMAGE_TYPES)} в base64.'
+        )
+    try:
+        content = base64.b64decode(data, validate=True)
+    except (ValueError, binascii.Error):
+        raise RowError('image: некорректная строка base64.')
+    extension, image_format = image_type
+    try:
+        with Image.open(BytesIO(content)) as image:
+            detected_format = image.format
+            image.verify()
+    except Exception:
+        raise RowError('image: данные не являются изображением.')
+    if detected_format != image_format:
+        raise RowError(f'image: данные не являются изображением {extension}.')
+    return ContentFile(content, name=f'{uuid.uuid4()}.{extension}')
+
+
+class RecipeImporter:
+    def __init__(self, default_author=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.default_author = default_author
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.errors = []
+        self.tags = {}
+        for tag in Tag.objects.all():
+            self.tags[tag.id] = tag
+            self.tags[tag.slug] = tag
+
+    def run(self, lines):
+        for chunk in chunked(read_rows(lines), self.chunk_size):
+            self.import_chunk(chunk)
+        return {'created': self.created, 'errors': self.errors}
+
+    def add_error(self, number, error):
+        self.errors.append({'line': number, 'error': str(error)})
+
+    def load_references(self, chunk):
+        ingredient_ids = set()
+        ingredient_names = set()
+        authors = set()
+        for _, row in chunk:
+            if not isinstance(row, dict):
+                continue
+            if row.get('author'):
+                authors.add(str(row['author']))
+            for item in row.get('ingredients') or []:
+                if not isinstance(item, dict):
+                    continue
+                if isinstance(item.get('id'), int):
+                    ingredient_ids.add(item['id'])
+                elif isinstance(item.get('name'), str):
+                    ingredient_names.add(item['name'])
+        ingredients = {}
+        for ingredient in Ingredient.objects.filter(id__in=ingredient_ids):
+            ingredients[ingredient.id] = ingredient
+        for ingredient in Ingredient.objects.filter(
+            name__in=ingredient_names,
+        ):
+            ingredients[ingredient.name] = ingredient
+        return ingredients, User.objects.in_bulk(authors, field_name='email')
+
+    def build_recipe(self, row, ingredients, authors, uploaded):
+        if not isinstance(row, dict):
+            raise RowError('Строка должна быть JSON-объектом.')
+        name = row.get('name')
+        if not isinstance(name, str) or not 0 < len(name) <= 200:
+            raise RowError('name: строка длиной от 1 до 200 символов.')
+        text = row.get('text')
+        if not isinstance(text, str) or not text:
+            raise RowError('text: обязательное поле.')
+        author = self.default_author
+        if row.get('author'):
+            author = authors.get(str(row['author']))
+            if author is None:
+                raise RowError(f'author: пользователь {row["author"]} '
+                               'не найден.')
+        tags = self.build_tags(row)
+        amounts = self.build_amounts(row, ingredients)
+        recipe = Recipe(
+            name=name,
+            text=text,
+            cooking_time=positive_int(
+                row.get('cooking_time'),
+                'cooking_time',
+            ),
+            author=author,
+        )
+        image = row.get('image')
+        if not isinstance(image, str) or not image:
+            raise RowError('image: обязательное поле.')
+        if image.startswith('data:'):
+            content = decode_image(image)
+            recipe.image.save(content.name, content, save=False)
+            uploaded.append(recipe.image.name)
+        else:
+            recipe.image.name = stored_image(image, recipe.image.storage)
+        return recipe, tags, amounts
+
+    def build_tags(self, row):
+        tags = {}
+        for key in row.get('tags') or []:
+            if not isinstance(key, (int, str)) or key not in self.tags:
+                raise RowError(f'tags: тэг {key} не найден.')
+            tags[self.tags[key].id] = self.tags[key]
+        if not tags:
+            raise RowError('tags: нужно указать хотя бы один тэг.')
+        return tags
+
+    def build_amounts(self, row, ingredients):
+        amounts = {}
+        for item in row.get('ingredients') or []:
+            if not isinstance(item, dict):
+                raise RowError('ingredients: ожидается список объектов.')
+            key = item.get('id', item.get('name'))
+            ingredient = None
+            if isinstance(key, (int, str)):
+                ingredient = ingredients.get(key)
+            if ingredient is None:
+                raise RowError(f'ingredients: ингредиент {key} не найден.')
+            if ingredient.id in amounts:
+                raise RowError('ingredients: ингредиенты не должны '
+                               'повторятся.')
+            amounts[ingredient.id] = positive_int(
+                item.get('amount'),
+                'ingredients.amount',
+            )
+        if not amounts:
+            raise RowError('ingredients: нужно указать хотя бы один '
+                           'ингредиент.')
+        return amounts
+
+    def import_chunk(self, chunk):
+        ingredients, authors = self.load_references(chunk)
+        prepared = []
+        uploaded = []
+        for number, row in chunk:
+            if isinstance(row, RowError):
+                self.add_error(number, row)
+                continue
+            try:
+                prepared.append((
+                    number,
+                    *self.build_recipe(row, ingredients, authors, uploaded),
+                ))
+            except RowError as error:
+                self.add_error(number, error)
+        if not prepared:
+            return
+        try:
+            with transaction.atomic():
+                self.write(prepared)
+        except DatabaseError as error:
+            # Откат транзакции не затрагивает файлы, загруженные для строк
+            # этой пачки, поэтому они удаляются вручную.
+            storage = Recipe._meta.get_field('image').storage
+            for name in uploaded:
+                storage.delete(name)
+            for number, *_ in prepared:
+                self.add_error(number, error)
+            return
+        self.created += len(prepared)
+
+    def write(self, prepared):
+        recipes = [recipe for _, recipe, _, _ in prepared]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            add_recipes_count(recipes)
+            fan_out_recipes(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for _, recipe, _, amounts in prepared
+            for ingredient_id, amount in amounts.items()
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for _, recipe, tags, _ in prepared
+            for tag in tags.values()
+        )
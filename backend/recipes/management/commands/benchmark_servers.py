@@ -0,0 +1,287 @@
+import http.client
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+from recipes.dataset import seed_dataset  # isort: skip
+from recipes.models import Ingredient  # isort: skip
+
+SERVERS = {
+    'wsgi': ('config.wsgi:application', ()),
+    'asgi': (
+        'config.asgi:application',
+        ('--worker-class', 'uvicorn.workers.UvicornWorker'),
+    ),
+}
+# ALLOWED_HOSTS допускает только имя сервиса в docker-сети.
+HOST = 'backend'
+# Горячие эндпоинты чтения, которые под ASGI обслуживаются асинхронно.
+ROUTES = (
+    '/api/tags/',
+    '/api/ingredients/?name={prefix}',
+    '/api/recipes/',
+    '/api/recipes/{recipe}/',
+    '/api/recipes/download_shopping_cart/',
+)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки горячих эндпоинтов '
+        'чтения под gunicorn в режимах WSGI и ASGI с одинаковым числом '
+        'воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Число воркеров gunicorn в обоих режимах.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[1, 8, 32, 64],
+            help='Число одновременных клиентов (можно несколько значений).',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность замера на каждом уровне, секунд.',
+        )
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=2000,
+            help='Количество рецептов в тестовом наборе данных.',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Порт, на котором запускаются проверяемые серверы.',
+        )
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=list(SERVERS),
+            default=list(SERVERS),
+            help='Какие режимы сравнивать.',
+        )
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp()
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            # Серверы работают в отдельных процессах и не видят базу в
+            # памяти, поэтому тестовая база создаётся файлом.
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                workdir,
+                'benchmark.sqlite3',
+            )
+        test_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            state = self.prepare(options)
+            results = []
+            for mode in options['modes']:
+                with self.server(mode, test_name, workdir, options):
+                    for concurrency in options['concurrency']:
+                        result = self.load(state, concurrency, options)
+                        results.append((mode, concurrency, result))
+                        self.report(mode, concurrency, result)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.summary(results)
+
+    def prepare(self, options):
+        dataset = seed_dataset(
+            recipes=options['recipes'],
+            users=max(options['recipes'] // 20, 25),
+        )
+        return {
+            'token': Token.objects.create(user=dataset['viewer']).key,
+            'prefix': Ingredient.objects.order_by('id').values_list(
+                'name',
+                flat=True,
+            ).first()[:2],
+            'recipe': dataset['recipe_ids'][0],
+        }
+
+    def server(self, mode, database, workdir, options):
+        return Server(mode, database, workdir, options, self.stdout)
+
+    def load(self, state, concurrency, options):
+        paths = [path.format(**state) for path in ROUTES]
+        headers = {
+            'Host': HOST,
+            'Authorization': f'Token {state["token"]}',
+        }
+        deadline = time.perf_counter() + options['duration']
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def client(number):
+            conn = http.client.HTTPConnection('127.0.0.1', options['port'])
+            own_latencies = []
+            own_errors = 0
+            step = number
+            while time.perf_counter() < deadline:
+                path = paths[step % len(paths)]
+                step += 1
+                started = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    own_errors += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection(
+                        '127.0.0.1',
+                        options['port'],
+                    )
+                    continue
+                if response.status >= 400:
+                    own_errors += 1
+                    continue
+                own_latencies.append(time.perf_counter() - started)
+            conn.close()
+            with lock:
+                latencies.extend(own_latencies)
+                errors.append(own_errors)
+
+        threads = [
+            threading.Thread(target=client, args=(number,))
+            for number in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if not latencies:
+            raise CommandError('Сервер не ответил ни на один запрос.')
+        return {
+            'requests': len(latencies),
+            'errors': sum(errors),
+            'rps': len(latencies) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+        }
+
+    def report(self, mode, concurrency, result):
+        self.stdout.write(
+            f'{mode}, {concurrency} клиентов: '
+            f'{result["rps"]:.0f} запросов/с, '
+            f'p50 {result["p50_ms"]:.1f} мс, '
+            f'p99 {result["p99_ms"]:.1f} мс, '
+            f'ошибок {result["errors"]}'
+        )
+
+    def summary(self, results):
+        by_level = {}
+        for mode, concurrency, result in results:
+            by_level.setdefault(concurrency, {})[mode] = result
+        for concurrency, modes in sorted(by_level.items()):
+            if 'wsgi' not in modes or 'asgi' not in modes:
+                continue
+            wsgi, asgi = modes['wsgi'], modes['asgi']
+            self.stdout.write(
+                f'{concurrency} клиентов: ASGI/WSGI по пропускной '
+                f'способности {asgi["rps"] / wsgi["rps"]:.2f}, '
+                f'по p99 {asgi["p99_ms"] / wsgi["p99_ms"]:.2f}'
+            )
+
+
+class Server:
+    def __init__(self, mode, database, workdir, options, stdout):
+        self.mode = mode
+        self.database = database
+        self.workdir = workdir
+        self.options = options
+        self.stdout = stdout
+        self.process = None
+
+    def __enter__(self):
+        app, extra = SERVERS[self.mode]
+        env = dict(
+            os.environ,
+            DB_NAME=self.database,
+            DJANGO_SECRET_KEY=settings.SECRET_KEY,
+        )
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        self.log = open(os.path.join(self.workdir, f'{self.mode}.log'), 'w')
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', app,
+                '--workers', str(self.options['workers']),
+                '--bind', f'127.0.0.1:{self.options["port"]}',
+                '--config', 'python:config.gunicorn',
+                *extra,
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        self.wait_ready()
+        self.stdout.write(
+            f'{self.mode}: gunicorn запущен, воркеров '
+            f'{self.options["workers"]}.'
+        )
+        return self
+
+    def wait_ready(self):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(
+                    f'{self.mode}: gunicorn завершился, см. {self.log.name}.'
+                )
+            try:
+                conn = http.client.HTTPConnection(
+                    '127.0.0.1',
+                    self.options['port'],
+                    timeout=1,
+                )
+                conn.request('GET', '/api/tags/', headers={'Host': HOST})
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.process.terminate()
+        raise CommandError(f'{self.mode}: gunicorn не запустился за 30 с.')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
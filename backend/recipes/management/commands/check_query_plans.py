@@ -0,0 +1,145 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes.dataset import seed_dataset  # isort: skip
+from recipes.filters import RecipeFilter  # isort: skip
+from recipes.models import Recipe, TimelineEntry  # isort: skip
+from recipes.utils import shopping_cart_ingredients  # isort: skip
+from users.utils import (  # isort: skip
+    latest_recipes_by_authors, subscribed_authors)
+
+LARGE_TABLES = (
+    'recipes_recipe',
+    'recipes_recipe_tags',
+    'recipes_ingredientinrecipe',
+    'recipes_favorite',
+    'recipes_shoppinglist',
+    'recipes_shoppinglistitem',
+    'users_follow',
+    'recipes_timelineentry',
+)
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?\s*$')
+
+
+class FakeRequest:
+    def __init__(self, user):
+        self.user = user
+
+
+def large_tables(min_rows):
+    tables = []
+    with connection.cursor() as cursor:
+        for table in LARGE_TABLES:
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            if cursor.fetchone()[0] >= min_rows:
+                tables.append(table)
+    return tables
+
+
+def sequential_scans(plan, tables):
+    if connection.vendor == 'postgresql':
+        scanned = POSTGRESQL_SCAN.findall(plan)
+    else:
+        scanned = [
+            match.group(1)
+            for match in map(SQLITE_SCAN.search, plan.splitlines())
+            if match
+        ]
+    return sorted(set(scanned).intersection(tables))
+
+
+def feed_queries(viewer, authors, tags):
+    request = FakeRequest(viewer)
+    following = list(subscribed_authors(viewer))
+    return {
+        'recipes feed': Recipe.objects.order_by('-created', 'id')[:10],
+        'recipes feed, next cursor page': Recipe.objects.filter(
+            created__lt=timezone.now(),
+        ).order_by('-created', 'id')[:10],
+        'recipes by author': Recipe.objects.filter(
+            author=authors[1],
+        ).order_by('-created', 'id')[:10],
+        'recipes by tags': RecipeFilter(
+            {'tags': [tag.slug for tag in tags[:2]]},
+            queryset=Recipe.objects.order_by('-created', 'id'),
+            request=request,
+        ).qs[:10],
+        'favorited recipes': RecipeFilter(
+            {'is_favorited': 'true'},
+            queryset=Recipe.objects.order_by('-created', 'id'),
+            request=request,
+        ).qs[:10],
+        'subscriptions': subscribed_authors(viewer)[:10],
+        'subscriptions, latest recipes': latest_recipes_by_authors(
+            following,
+            3,
+        ),
+        'shopping cart': shopping_cart_ingredients(viewer),
+        'followed authors feed': TimelineEntry.objects.filter(
+            user=viewer,
+        ).order_by('-created', 'recipe_id')[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит планы (EXPLAIN) основных запросов API и завершается с '
+        'ошибкой, если в них встречается последовательное сканирование '
+        'большой таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=20000,
+            help='Количество рецептов в тестовом наборе данных.',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='С какого числа строк таблица считается большой.',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Печатать планы всех запросов, а не только проблемных.',
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            dataset = seed_dataset(
+                recipes=options['recipes'],
+                users=max(options['recipes'] // 20, 25),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            tables = large_tables(options['min_rows'])
+            queries = feed_queries(
+                dataset['viewer'],
+                dataset['authors'],
+                dataset['tags'],
+            )
+            for title, queryset in queries.items():
+                failures += self.check_plan(title, queryset, tables, options)
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(
+                'Последовательное сканирование: ' + '; '.join(failures)
+            )
+        self.stdout.write('Все запросы используют индексы.')
+
+    def check_plan(self, title, queryset, tables, options):
+        plan = queryset.explain()
+        scans = sequential_scans(plan, tables)
+        status = 'FAIL' if scans else 'OK'
+        self.stdout.write(f'[{status}] {title}')
+        if scans or options['verbose_plans']:
+            self.stdout.write(plan)
+        return [f'{title} ({", ".join(scans)})'] if scans else []
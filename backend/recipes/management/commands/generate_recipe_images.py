@@ -0,0 +1,68 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants  # isort: skip
+from recipes.models import Recipe  # isort: skip
+
+logger = logging.getLogger('recipes.images')
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Количество рецептов, загружаемых из базы за один запрос.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах между проходами.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_pending(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано рецептов: {processed}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def process_pending(self, batch_size):
+        recipes = Recipe.objects.filter(
+            image_variants_ready=False,
+            image_variants_failed=False,
+        ).only('id', 'image').order_by('id').iterator(chunk_size=batch_size)
+        processed = 0
+        for recipe in recipes:
+            try:
+                generate_variants(recipe)
+            except Exception:
+                # Битый файл или путь одного рецепта не должен останавливать
+                # воркер: рецепт помечается и больше не берётся в работу,
+                # пока изображение не заменят.
+                logger.exception(
+                    'Рецепт %s: не удалось создать уменьшенные копии.',
+                    recipe.id,
+                )
+                outcome = {'image_variants_failed': True}
+            else:
+                outcome = {'image_variants_ready': True}
+                processed += 1
+            Recipe.objects.filter(
+                id=recipe.id,
+                image=recipe.image.name,
+            ).update(**outcome)
+        return processed
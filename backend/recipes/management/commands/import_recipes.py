@@ -0,0 +1,50 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.importer import DEFAULT_CHUNK_SIZE, RecipeImporter  # isort: skip
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Импортирует рецепты из файла NDJSON (по объекту на строку).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Путь к файлу NDJSON или "-" для чтения из stdin.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Email автора для строк без поля author.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, записываемых за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(email=options['author']).first()
+            if author is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        importer = RecipeImporter(author, options['chunk_size'])
+        if options['path'] == '-':
+            result = importer.run(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                result = importer.run(lines)
+        for error in result['errors']:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(
+            f'Создано рецептов: {result["created"]}, '
+            f'ошибок: {len(result["errors"])}.'
+        )
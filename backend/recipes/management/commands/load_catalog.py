@@ -0,0 +1,152 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import (  # isort: skip
+    bump_ingredients_version, bump_tags_version)
+from recipes.models import Ingredient, Tag  # isort: skip
+from recipes.search import invalidate_ingredient_index  # isort: skip
+
+DEFAULT_DATA_DIR = Path(settings.BASE_DIR).parent / 'data'
+
+
+def read_ingredients(path):
+    with open(path, encoding='utf-8') as source:
+        if path.suffix == '.json':
+            for item in json.load(source):
+                yield item['name'], item['measurement_unit']
+        else:
+            for row in csv.reader(source):
+                if row:
+                    yield row[0], row[1]
+
+
+def read_tags(path):
+    with open(path, encoding='utf-8') as source:
+        for row in csv.reader(source):
+            if row:
+                yield row[2], {'name': row[0], 'color': row[1]}
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = dict(islice(rows, size))
+    while batch:
+        yield batch
+        batch = dict(islice(rows, size))
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает или обновляет справочники ингредиентов и тэгов '
+        '(повторный запуск безопасен).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            type=Path,
+            default=DEFAULT_DATA_DIR / 'ingredients.csv',
+            help='Файл ингредиентов (.csv "имя,единица" или .json).',
+        )
+        parser.add_argument(
+            '--tags',
+            type=Path,
+            default=DEFAULT_DATA_DIR / 'tags.csv',
+            help='Файл тэгов (.csv "имя,цвет,ссылка").',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Количество строк, записываемых за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        for path in (options['ingredients'], options['tags']):
+            if not path.exists():
+                raise CommandError(f'Файл {path} не найден.')
+        summary = self.load_ingredients(
+            read_ingredients(options['ingredients']),
+            options['batch_size'],
+        )
+        self.report('Ингредиенты', summary)
+        summary = self.load_tags(
+            read_tags(options['tags']),
+            options['batch_size'],
+        )
+        self.report('Тэги', summary)
+
+    def report(self, title, summary):
+        self.stdout.write(
+            f'{title}: создано {summary["created"]}, '
+            f'обновлено {summary["updated"]}, '
+            f'без изменений {summary["unchanged"]}.'
+        )
+
+    def load_ingredients(self, rows, batch_size):
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for batch in batches(rows, batch_size):
+            with transaction.atomic():
+                existing = Ingredient.objects.in_bulk(
+                    list(batch),
+                    field_name='name',
+                )
+                to_create = []
+                to_update = []
+                for name, measurement_unit in batch.items():
+                    ingredient = existing.get(name)
+                    if ingredient is None:
+                        to_create.append(Ingredient(
+                            name=name,
+                            measurement_unit=measurement_unit,
+                        ))
+                    elif ingredient.measurement_unit != measurement_unit:
+                        ingredient.measurement_unit = measurement_unit
+                        to_update.append(ingredient)
+                    else:
+                        summary['unchanged'] += 1
+                Ingredient.objects.bulk_create(to_create)
+                Ingredient.objects.bulk_update(
+                    to_update,
+                    ['measurement_unit'],
+                )
+                summary['created'] += len(to_create)
+                summary['updated'] += len(to_update)
+        if summary['created'] or summary['updated']:
+            bump_ingredients_version()
+            invalidate_ingredient_index()
+        return summary
+
+    def load_tags(self, rows, batch_size):
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0}
+        for batch in batches(rows, batch_size):
+            with transaction.atomic():
+                existing = Tag.objects.in_bulk(list(batch), field_name='slug')
+                to_create = []
+                to_update = []
+                for slug, fields in batch.items():
+                    tag = existing.get(slug)
+                    if tag is None:
+                        to_create.append(Tag(slug=slug, **fields))
+                    elif (tag.name, tag.color) != (
+                        fields['name'],
+                        fields['color'],
+                    ):
+                        tag.name = fields['name']
+                        tag.color = fields['color']
+                        to_update.append(tag)
+                    else:
+                        summary['unchanged'] += 1
+                Tag.objects.bulk_create(to_create)
+                Tag.objects.bulk_update(to_update, ['name', 'color'])
+                summary['created'] += len(to_create)
+                summary['updated'] += len(to_update)
+        if summary['created'] or summary['updated']:
+            bump_tags_version()
+        return summary
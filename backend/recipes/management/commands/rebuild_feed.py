@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_timelines  # isort: skip
+from recipes.models import TimelineEntry  # isort: skip
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет ленты подписок последними рецептами авторов '
+        '(нужно после первого развёртывания ленты или смены '
+        'FEED_FANOUT_LIMIT).'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_timelines()
+        self.stdout.write(
+            f'Записей в лентах: {TimelineEntry.objects.count()}.'
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import reconcile_counters  # isort: skip
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики (избранное, списки '
+        'покупок, рецепты и подписчики) и исправляет расхождения.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_counters()
+        for counter, total in fixed.items():
+            self.stdout.write(f'{counter}: исправлено {total}')
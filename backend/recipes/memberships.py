@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from users.models import Follow  # isort: skip
+from .cache import bump_version, cache_stats, get_version  # isort: skip
+from .models import Favorite, ShoppingList  # isort: skip
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+FOLLOWING = 'following'
+
+SOURCES = {
+    FAVORITES: (Favorite, 'recipe_id'),
+    SHOPPING_CART: (ShoppingList, 'recipe_id'),
+    FOLLOWING: (Follow, 'author_id'),
+}
+KINDS_BY_MODEL = {model: kind for kind, (model, _) in SOURCES.items()}
+
+
+def membership_namespace(kind, user_id):
+    return f'membership:{kind}:{user_id}'
+
+
+def get_membership(user, kind):
+    memo = user.__dict__.setdefault('_memberships', {})
+    if kind in memo:
+        return memo[kind]
+    namespace = membership_namespace(kind, user.pk)
+    # Поколение читается до выборки: если изменение зафиксируется, пока
+    # идёт запрос к базе, оно сменит поколение, и записанный ниже набор
+    # окажется под ключом, который больше никто не прочитает.
+    key = f'{namespace}:{get_version(namespace)}'
+    ids = cache.get(key)
+    cache_stats.add(kind, 'miss' if ids is None else 'hit')
+    if ids is None:
+        model, field = SOURCES[kind]
+        ids = frozenset(
+            model.objects.filter(user=user).values_list(field, flat=True)
+        )
+        cache.set(
+            key,
+            ids,
+            getattr(settings, 'MEMBERSHIP_CACHE_TIMEOUT', 60 * 10),
+        )
+    memo[kind] = ids
+    return ids
+
+
+def is_member(user, kind, object_id):
+    if not user.is_authenticated:
+        return False
+    return object_id in get_membership(user, kind)
+
+
+def forget_membership(user, kind):
+    namespace = membership_namespace(kind, getattr(user, 'pk', user))
+    transaction.on_commit(lambda: bump_version(namespace))
+    if hasattr(user, '__dict__'):
+        user.__dict__.get('_memberships', {}).pop(kind, None)
+
+
+def member_instance_user(instance):
+    return instance._state.fields_cache.get('user', instance.user_id)
+
+
+def membership_added(sender, instance, created, **kwargs):
+    if created:
+        forget_membership(
+            member_instance_user(instance),
+            KINDS_BY_MODEL[sender],
+        )
+
+
+def membership_removed(sender, instance, **kwargs):
+    forget_membership(member_instance_user(instance), KINDS_BY_MODEL[sender])
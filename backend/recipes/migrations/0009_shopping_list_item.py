@@ -0,0 +1,59 @@
+# Generated by Django 3.2.7 on 2026-10-18 14:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def backfill_shopping_lists(apps, schema_editor):
+    item_model = apps.get_model('recipes', 'ShoppingListItem')
+    amounts = apps.get_model('recipes', 'IngredientInRecipe')
+    totals = amounts.objects.filter(
+        recipe__recipe_in_shopping_list__isnull=False,
+    ).values(
+        'recipe__recipe_in_shopping_list__user_id',
+        'ingredient_id',
+    ).annotate(
+        total=Sum('amount'),
+    ).order_by()
+    item_model.objects.bulk_create(
+        (
+            item_model(
+                user_id=row['recipe__recipe_in_shopping_list__user_id'],
+                ingredient_id=row['ingredient_id'],
+                amount=row['total'],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'позиция списка покупок',
+                'verbose_name_plural': 'Итоговые списки покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunPython(backfill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:06
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_shopping_list_item'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='cooking_time',
+            field=models.IntegerField(help_text='Укажите время в минутах, необходимое для приготовления', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Время приготовления'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_alter_recipe_cooking_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_failed',
+            field=models.BooleanField(default=False, verbose_name='Не удалось создать уменьшенные копии изображения'),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Prefetch
+
+from config.counters import CounterFieldsMixin  # isort: skip
 
 User = get_user_model()
 
@@ -86,9 +89,30 @@ class IngredientInRecipe(models.Model):
                 name='unique_ingredient_in_recipe',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='ingredient_in_recipe_cover_idx',
+            ),
+        ]
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related(
+            'author',
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'all_ingredients',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient',
+                ),
+            ),
+        )
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     name = models.CharField(
         max_length=200,
         verbose_name='Название',
@@ -103,6 +127,14 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         help_text='Приложите подходящее фото',
     )
+    image_variants_ready = models.BooleanField(
+        default=False,
+        verbose_name='Уменьшенные копии изображения готовы',
+    )
+    image_variants_failed = models.BooleanField(
+        default=False,
+        verbose_name='Не удалось создать уменьшенные копии изображения',
+    )
     cooking_time = models.IntegerField(
         verbose_name='Время приготовления',
         help_text='Укажите время в минутах, необходимое для приготовления',
@@ -130,11 +162,41 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата добавления',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+
+    objects = RecipeQuerySet.as_manager()
+    counter_fields = (
+        'favorites_count',
+        'in_carts_count',
+    )
 
     class Meta:
         ordering = ('-created', )
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-created', 'id'],
+                name='recipe_created_idx',
+            ),
+            models.Index(
+                fields=['author', '-created'],
+                name='recipe_author_created_idx',
+            ),
+            models.Index(
+                fields=['-favorites_count', '-created', 'id'],
+                name='recipe_popularity_idx',
+            ),
+        ]
 
     def __repr__(self):
         return (
@@ -218,3 +280,85 @@ class ShoppingList(models.Model):
             f'Рецепт "{self.recipe.name}" в списке покупок пользователя '
             f'{self.user.username}.'
         )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'позиция списка покупок'
+        verbose_name_plural = 'Итоговые списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f'Ингредиент {self.ingredient_id} ({self.amount}) в списке '
+            f'покупок пользователя {self.user_id}'
+        )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created', 'recipe'],
+                name='timeline_user_created_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Рецепт {self.recipe_id} в ленте пользователя {self.user_id}'
@@ -0,0 +1,236 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connection,
+                       connections)
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .cache import INGREDIENTS, cache_stats, get_version  # isort: skip
+from .models import Ingredient  # isort: skip
+
+WORD_SEPARATORS = ' -(,'
+SQLITE_FTS_TABLE = 'recipes_recipe_fts'
+SQLITE_FTS_TRIGGERS = {
+    f'{SQLITE_FTS_TABLE}_insert': (
+        'AFTER INSERT ON recipes_recipe BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE} (rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+    f'{SQLITE_FTS_TABLE}_delete': (
+        'AFTER DELETE ON recipes_recipe BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE} ({SQLITE_FTS_TABLE}, rowid, name, '
+        "text) VALUES ('delete', old.id, old.name, old.text); END"
+    ),
+    f'{SQLITE_FTS_TABLE}_update': (
+        'AFTER UPDATE OF name, text ON recipes_recipe BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE} ({SQLITE_FTS_TABLE}, rowid, name, '
+        "text) VALUES ('delete', old.id, old.name, old.text); "
+        f'INSERT INTO {SQLITE_FTS_TABLE} (rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+}
+# (алиас базы, файл базы) -> установлен ли полнотекстовый поиск SQLite.
+sqlite_fts_installed = {}
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'INGREDIENT_INDEX_TTL', 300)
+
+    def invalidate(self):
+        self._state = None
+
+    def build(self):
+        version = get_version(INGREDIENTS)
+        entries = [
+            (name.lower(), {
+                'id': pk,
+                'name': name,
+                'measurement_unit': measurement_unit,
+            })
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id',
+                'name',
+                'measurement_unit',
+            )
+        ]
+        entries.sort(key=lambda entry: entry[0])
+        keys = [key for key, _ in entries]
+        state = (keys, entries, time.monotonic(), version)
+        self._state = state
+        return state
+
+    def is_fresh(self, state):
+        return (
+            state is not None
+            and time.monotonic() - state[2] <= self.ttl
+            and state[3] == get_version(INGREDIENTS)
+        )
+
+    def get_state(self):
+        state = self._state
+        if self.is_fresh(state):
+            cache_stats.add('ingredient_index', 'hit')
+            return state
+        with self._lock:
+            if self.is_fresh(self._state):
+                cache_stats.add('ingredient_index', 'hit')
+                return self._state
+            cache_stats.add('ingredient_index', 'miss')
+            return self.build()
+
+    def search(self, query, limit):
+        query = query.strip().lower()
+        keys, entries, *_ = self.get_state()
+        result = []
+        position = bisect_left(keys, query)
+        while (
+            position < len(keys)
+            and keys[position].startswith(query)
+            and len(result) < limit
+        ):
+            result.append(entries[position][1])
+            position += 1
+        if len(result) >= limit:
+            return result
+        word_matches = []
+        inner_matches = []
+        for key, item in entries:
+            found = key.find(query, 1)
+            if found == -1 or key.startswith(query):
+                continue
+            if key[found - 1] in WORD_SEPARATORS:
+                word_matches.append(item)
+            else:
+                inner_matches.append(item)
+        result.extend(word_matches)
+        result.extend(inner_matches)
+        return result[:limit]
+
+
+def trigram_search(query, limit):
+    return [
+        {
+            'id': ingredient.id,
+            'name': ingredient.name,
+            'measurement_unit': ingredient.measurement_unit,
+        }
+        for ingredient in Ingredient.objects.raw(
+            'SELECT id, name, measurement_unit FROM recipes_ingredient '
+            'WHERE name %% %s ORDER BY similarity(name, %s) DESC, name '
+            'LIMIT %s',
+            [query, query, limit],
+        )
+    ]
+
+
+def search_ingredients(query, limit=None):
+    if limit is None:
+        limit = getattr(settings, 'INGREDIENT_SEARCH_LIMIT', 20)
+    result = ingredient_index.search(query, limit)
+    if (
+        not result
+        and getattr(settings, 'INGREDIENT_SEARCH_TRIGRAM', False)
+        and connection.vendor == 'postgresql'
+    ):
+        return trigram_search(query.strip().lower(), limit)
+    return result
+
+
+def invalidate_ingredient_index(*args, **kwargs):
+    ingredient_index.invalidate()
+
+
+ingredient_index = IngredientIndex()
+
+
+def postgresql_search(queryset, query):
+    tsquery = "websearch_to_tsquery('russian', %s)"
+    return queryset.annotate(
+        search_rank=RawSQL(
+            f'ts_rank(recipes_recipe.search_vector, {tsquery})',
+            [query],
+        ),
+    ).extra(
+        where=[f'recipes_recipe.search_vector @@ {tsquery}'],
+        params=[query],
+    )
+
+
+def sqlite_search(queryset, query):
+    words = re.findall(r'\w+', query.lower())
+    match = ' '.join(f'"{word}"*' for word in words) or '""'
+    return queryset.extra(
+        select={
+            'search_rank': f'-bm25({SQLITE_FTS_TABLE}, 10.0, 1.0)',
+        },
+        tables=[SQLITE_FTS_TABLE],
+        where=[
+            f'{SQLITE_FTS_TABLE}.rowid = recipes_recipe.id',
+            f'{SQLITE_FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+    )
+
+
+def has_sqlite_fts(alias, refresh=False):
+    # Таблица поиска появляется только при migrate (см. install_sqlite_fts),
+    # поэтому sqlite_master не опрашивается на каждый поисковый запрос.
+    database = connections[alias]
+    key = (alias, database.settings_dict['NAME'])
+    if refresh or key not in sqlite_fts_installed:
+        with database.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s)',
+                [SQLITE_FTS_TABLE, f'{SQLITE_FTS_TABLE}_update'],
+            )
+            sqlite_fts_installed[key] = cursor.fetchone()[0] == 2
+    return sqlite_fts_installed[key]
+
+
+def search_recipes(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        queryset = postgresql_search(queryset, query)
+    elif vendor == 'sqlite' and has_sqlite_fts(queryset.db):
+        queryset = sqlite_search(queryset, query)
+    else:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        )
+    return queryset.order_by('-search_rank', '-created', 'id')
+
+
+def install_sqlite_fts(using=DEFAULT_DB_ALIAS, **kwargs):
+    database = connections[using]
+    if database.vendor != 'sqlite' or has_sqlite_fts(using, refresh=True):
+        return
+    try:
+        with database.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} '
+                'USING fts5(name, text, content=recipes_recipe, '
+                "content_rowid=id, tokenize='unicode61 remove_diacritics 2')"
+            )
+            for name, body in SQLITE_FTS_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+            cursor.execute(
+                f'INSERT INTO {SQLITE_FTS_TABLE} ({SQLITE_FTS_TABLE}) '
+                "VALUES ('rebuild')"
+            )
+    except OperationalError:
+        # SQLite собран без FTS5: поиск работает через icontains.
+        pass
+    has_sqlite_fts(using, refresh=True)
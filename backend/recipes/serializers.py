@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.db import transaction
-from django.shortcuts import get_object_or_404
-from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 
+from .images import (  # isort: skip
+    MEDIUM, THUMBNAIL, RecipeImageField, image_replaced)
+from .memberships import FAVORITES, SHOPPING_CART, is_member  # isort: skip
 from .models import (  # isort: skip
-    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag)
+    Ingredient, IngredientInRecipe, Recipe, Tag)
+from .shopping_list import recipe_ingredients_changed  # isort: skip
 from users.serializers import ModifiedDjoserUserSerializer  # isort: skip
 
+# Проверка целых чисел во вложенных списках, которые разбираются вручную.
+INTEGER = serializers.IntegerField()
+
 
 class TagSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=False)
@@ -56,8 +62,15 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 
 class IngredientsSerializerField(serializers.Field):
     def to_representation(self, value):
+        ingredients = value.all_ingredients.all()
+        if 'all_ingredients' not in getattr(
+            value,
+            '_prefetched_objects_cache',
+            {},
+        ):
+            ingredients = ingredients.select_related('ingredient')
         return IngredientInRecipeSerializer(
-            IngredientInRecipe.objects.filter(recipe=value),
+            ingredients,
             many=True,
         ).data
 
@@ -67,7 +80,7 @@ class IngredientsSerializerField(serializers.Field):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(use_url=True)
+    image = RecipeImageField(list_variant=MEDIUM, use_url=True)
     ingredients = IngredientsSerializerField(source='*')
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
@@ -87,6 +100,8 @@ class RecipeSerializer(serializers.ModelSerializer):
             'image',
             'text',
             'cooking_time',
+            'favorites_count',
+            'in_carts_count',
         ]
 
     def to_internal_value(self, data):
@@ -106,17 +121,11 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
-        if not request.user.is_authenticated:
-            return False
-        user = request.user
-        return Favorite.objects.filter(recipe=obj, user=user).exists()
+        return is_member(request.user, FAVORITES, obj.id)
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
-        if not request.user.is_authenticated:
-            return False
-        user = request.user
-        return ShoppingList.objects.filter(recipe=obj, user=user).exists()
+        return is_member(request.user, SHOPPING_CART, obj.id)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -127,41 +136,68 @@ class RecipeSerializer(serializers.ModelSerializer):
         return self.performer(validated_data, instance)
 
     def performer(self, validated_data, recipe=None):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        if recipe is None:
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        created = recipe is None
+        if created:
             recipe = self.Meta.model.objects.create(**validated_data)
         else:
-            IngredientInRecipe.objects.filter(recipe=recipe).delete()
-            old_tags = Tag.objects.filter(recipes=recipe)
-            for tag in old_tags:
-                recipe.tags.remove(tag)
+            if 'image' in validated_data:
+                image_replaced(recipe, recipe.image.name)
             for key, value in validated_data.items():
                 setattr(recipe, key, value)
             recipe.save()
-        for tag in tags:
-            recipe.tags.add(tag['id'])
-
-        IngredientInRecipe.objects.bulk_create(
-            [
-                IngredientInRecipe(
-                    recipe=recipe,
-                    ingredient=get_object_or_404(
-                        Ingredient,
-                        id=ingredient['id'],
-                    ),
-                    amount=ingredient['amount'],
-                ) for ingredient in ingredients
-            ]
-        )
+        if tags is not None:
+            recipe.tags.set([tag['id'] for tag in tags])
+        if ingredients is not None:
+            self.update_ingredients(recipe, ingredients, created)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients, created=False):
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        to_create = []
+        to_update = []
+        deltas = {
+            ingredient_id: -item.amount
+            for ingredient_id, item in existing.items()
+        }
+        for ingredient in ingredients:
+            deltas[ingredient['ingredient'].id] = deltas.get(
+                ingredient['ingredient'].id,
+                0,
+            ) + ingredient['amount']
+            item = existing.pop(ingredient['ingredient'].id, None)
+            if item is None:
+                to_create.append(
+                    IngredientInRecipe(
+                        recipe=recipe,
+                        ingredient=ingredient['ingredient'],
+                        amount=ingredient['amount'],
+                    )
+                )
+            elif item.amount != ingredient['amount']:
+                item.amount = ingredient['amount']
+                to_update.append(item)
+        if existing:
+            IngredientInRecipe.objects.filter(
+                id__in=[item.id for item in existing.values()],
+            ).delete()
+        if to_update:
+            IngredientInRecipe.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            IngredientInRecipe.objects.bulk_create(to_create)
+        if not created:
+            recipe_ingredients_changed(recipe.id, deltas)
+
     def validate_ingredients(self, value):
         if len(value) < 1:
             raise serializers.ValidationError(
                 'Нужно указать хотя бы один ингредиент.'
             )
-        all_ingredients_id = list()
+        amounts = dict()
         for ingredient in value:
             ingredient_id = ingredient.get('id')
             ingredient_amount = ingredient.get('amount')
@@ -171,22 +207,48 @@ class RecipeSerializer(serializers.ModelSerializer):
                     'количество (amount).'
                 )
             try:
-                ingredient_id = float(ingredient_id)
-                ingredient_amount = float(ingredient_amount)
-            except ValueError:
+                # IntegerField отвергает дробные значения (1.5, "1.5"),
+                # тогда как int() молча отбросил бы дробную часть.
+                ingredient_id = INTEGER.to_internal_value(ingredient_id)
+                ingredient_amount = INTEGER.to_internal_value(
+                    ingredient_amount,
+                )
+            except serializers.ValidationError:
                 raise serializers.ValidationError(
-                    'Номер (id) и количество (amount) должны быть числами.'
+                    'Номер (id) и количество (amount) должны быть '
+                    'целыми числами.'
                 )
-            if ingredient_id in all_ingredients_id:
+            if ingredient_id in amounts:
                 raise serializers.ValidationError(
                     'Ингредиенты не должны повторятся.'
                 )
-            else:
-                all_ingredients_id.append(ingredient_id)
             if ingredient_amount <= 0:
                 raise serializers.ValidationError(
                     'Количество должно быть больше 0.'
                 )
+            amounts[ingredient_id] = ingredient_amount
+        found = Ingredient.objects.in_bulk(list(amounts))
+        missing = [str(pk) for pk in amounts if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты с номерами {", ".join(missing)} не найдены.'
+            )
+        return [
+            {'ingredient': found[pk], 'amount': amount}
+            for pk, amount in amounts.items()
+        ]
+
+    def validate_tags(self, value):
+        tags_ids = {tag['id'] for tag in value}
+        found = Tag.objects.filter(id__in=tags_ids).values_list(
+            'id',
+            flat=True,
+        )
+        missing = [str(pk) for pk in tags_ids.difference(found)]
+        if missing:
+            raise serializers.ValidationError(
+                f'Тэги с номерами {", ".join(missing)} не найдены.'
+            )
         return value
 
     def validate_cooking_time(self, value):
@@ -204,7 +266,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeReadOnlySerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField(variant=THUMBNAIL)
 
     class Meta:
         model = Recipe
@@ -214,3 +276,18 @@ class ShortRecipeReadOnlySerializer(serializers.ModelSerializer):
             'image',
             'cooking_time',
         ]
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+
+    def validate_ids(self, value):
+        limit = getattr(settings, 'BULK_ACTION_LIMIT', 100)
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f'За один запрос можно передать не больше {limit} номеров.'
+            )
+        return list(dict.fromkeys(value))
@@ -0,0 +1,159 @@
+from django.apps import apps as global_apps
+from django.db import connection
+from django.db.models import (Case, F, IntegerField, OuterRef, Subquery, Sum,
+                              Value, When)
+from django.db.models.signals import post_save
+
+from .models import (  # isort: skip
+    IngredientInRecipe, ShoppingList, ShoppingListItem)
+
+BATCH_SIZE = 1000
+UPSERT_VENDORS = ('postgresql', 'sqlite')
+
+
+def recipe_amounts(recipe_id):
+    return dict(
+        IngredientInRecipe.objects.filter(
+            recipe_id=recipe_id,
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+def apply_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not user_ids or not deltas:
+        return
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas,
+    )
+    existing = set(items.values_list('user_id', 'ingredient_id'))
+    if existing:
+        items.update(amount=F('amount') + Case(
+            *(
+                When(ingredient_id=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in deltas.items()
+            ),
+            output_field=IntegerField(),
+        ))
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                amount=delta,
+            )
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0 and (user_id, ingredient_id) not in existing
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    if any(delta < 0 for delta in deltas.values()):
+        items.filter(amount__lte=0).delete()
+
+
+def recipe_ingredients_changed(recipe_id, deltas):
+    if not any(deltas.values()):
+        return
+    apply_deltas(
+        list(
+            ShoppingList.objects.filter(
+                recipe_id=recipe_id,
+            ).values_list('user_id', flat=True)
+        ),
+        deltas,
+    )
+
+
+def amounts_diff(before, after):
+    return {
+        ingredient_id: after.get(ingredient_id, 0) - before.get(
+            ingredient_id,
+            0,
+        )
+        for ingredient_id in before.keys() | after.keys()
+    }
+
+
+def recipes_totals(recipe_ids):
+    return IngredientInRecipe.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).values('ingredient_id').annotate(total=Sum('amount')).order_by()
+
+
+def add_recipes(user_id, recipe_ids):
+    if not recipe_ids:
+        return
+    if connection.vendor not in UPSERT_VENDORS:
+        apply_deltas([user_id], dict(
+            recipes_totals(recipe_ids).values_list('ingredient_id', 'total')
+        ))
+        return
+    totals, params = recipes_totals(recipe_ids).query.sql_with_params()
+    items = ShoppingListItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {items} (user_id, ingredient_id, amount) '
+            f'SELECT %s, ingredient_id, total FROM ({totals}) totals '
+            'WHERE true '
+            'ON CONFLICT (user_id, ingredient_id) '
+            f'DO UPDATE SET amount = {items}.amount + excluded.amount',
+            [user_id, *params],
+        )
+
+
+def remove_recipes(user_id, recipe_ids):
+    if not recipe_ids:
+        return
+    items = ShoppingListItem.objects.filter(user_id=user_id)
+    items.filter(
+        ingredient_id__in=IngredientInRecipe.objects.filter(
+            recipe_id__in=recipe_ids,
+        ).values('ingredient_id'),
+    ).update(amount=F('amount') - Subquery(
+        recipes_totals(recipe_ids).filter(
+            ingredient_id=OuterRef('ingredient_id'),
+        ).values('total')
+    ))
+    items.filter(amount__lte=0).delete()
+
+
+def cart_changed(sender, instance, created=True, **kwargs):
+    if not created:
+        return
+    if kwargs['signal'] is post_save:
+        add_recipes(instance.user_id, [instance.recipe_id])
+    else:
+        # Вызывается по pre_delete, пока ингредиенты рецепта ещё не
+        # удалены каскадом вместе с ним.
+        remove_recipes(instance.user_id, [instance.recipe_id])
+
+
+def rebuild_shopping_lists(apps=global_apps):
+    item_model = apps.get_model('recipes', 'ShoppingListItem')
+    amounts = apps.get_model('recipes', 'IngredientInRecipe')
+    item_model.objects.all().delete()
+    totals = amounts.objects.filter(
+        recipe__recipe_in_shopping_list__isnull=False,
+    ).values(
+        'recipe__recipe_in_shopping_list__user_id',
+        'ingredient_id',
+    ).annotate(
+        total=Sum('amount'),
+    ).order_by()
+    item_model.objects.bulk_create(
+        (
+            item_model(
+                user_id=row['recipe__recipe_in_shopping_list__user_id'],
+                ingredient_id=row['ingredient_id'],
+                amount=row['total'],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
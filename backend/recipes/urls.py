@@ -1,7 +1,19 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import DownloadShoppingCart, IngredientView, RecipeViewSet, TagView
+from config.async_views import make_async  # isort: skip
+from .views import (DownloadShoppingCart, IngredientView, RecipeViewSet,
+                    ShoppingCartView, TagView)
+
+# Под ASGI запросы на чтение к этим представлениям выполняются в пуле
+# потоков, не блокируя цикл событий (см. ASYNC_READ_VIEWS).
+ASYNC_VIEWS = (
+    DownloadShoppingCart,
+    IngredientView,
+    RecipeViewSet,
+    ShoppingCartView,
+    TagView,
+)
 
 router = DefaultRouter()
 router.register(
@@ -20,11 +32,16 @@ router.register(
     basename='tags',
 )
 
-urlpatterns = [
+urlpatterns = make_async([
+    path(
+        'recipes/shopping_cart/',
+        ShoppingCartView.as_view(),
+        name='shopping_cart',
+    ),
     path(
         'recipes/download_shopping_cart/',
         DownloadShoppingCart.as_view(),
         name='download_shopping_cart',
     ),
-    path('', include(router.urls)),
-]
+    path('', include(make_async(router.urls, ASYNC_VIEWS))),
+], ASYNC_VIEWS)
@@ -0,0 +1,66 @@
+import csv
+import json
+
+from .models import ShoppingListItem  # isort: skip
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def shopping_cart_ingredients(user):
+    return ShoppingListItem.objects.filter(
+        user=user,
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount',
+    )
+
+
+def shopping_cart_to_txt(ingredients):
+    yield 'Для выбранных рецептов понадобится:\n'
+    previous = None
+    for name, measurement_unit, amount in ingredients:
+        if previous is not None:
+            yield previous + ';\n'
+        previous = f'{name}: {amount} {measurement_unit}'
+    if previous is None:
+        yield 'список покупок пуст.\n'
+    else:
+        yield previous + '.\n'
+
+
+def shopping_cart_to_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(['name', 'measurement_unit', 'amount'])
+    for row in ingredients:
+        yield writer.writerow(row)
+
+
+def shopping_cart_to_json(ingredients):
+    yield '['
+    separator = ''
+    for name, measurement_unit, amount in ingredients:
+        item = json.dumps(
+            {
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount,
+            },
+            ensure_ascii=False,
+        )
+        yield separator + item
+        separator = ','
+    yield ']'
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': (shopping_cart_to_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_cart_to_csv, 'text/csv; charset=utf-8'),
+    'json': (shopping_cart_to_json, 'application/json'),
+}
@@ -1,27 +1,39 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import HttpResponse, get_object_or_404
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import (AllowAny, IsAuthenticated,
+from rest_framework.permissions import (AllowAny, IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from config.pagination import ModifiedPageNumberPagination  # isort: skip
+from config.pagination import (  # isort: skip
+    RecipeCursorPagination, RecipePagination, TimelineCursorPagination)
+from .bulk import bulk_members_response  # isort: skip
+from .cache import INGREDIENTS, TAGS, get_or_build  # isort: skip
+from .feed import feed_queryset  # isort: skip
 from .filters import IngredientFilter, RecipeFilter  # isort: skip
+from .importer import RecipeImporter  # isort: skip
+from .memberships import FAVORITES, SHOPPING_CART  # isort: skip
 from .models import (  # isort: skip
-    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag)
+    Favorite, Ingredient, Recipe, ShoppingList, Tag)
+from .search import search_ingredients  # isort: skip
 from .serializers import (  # isort: skip
     IngredientSerializer, RecipeSerializer, ShortRecipeReadOnlySerializer,
     TagSerializer)
+from .utils import (  # isort: skip
+    SHOPPING_CART_FORMATS, shopping_cart_ingredients)
 
 User = get_user_model()
 
+MAX_PK = 2 ** 63
+
 
 class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
     permission_classes = [
         IsAuthenticatedOrReadOnly,
     ]
@@ -30,7 +42,10 @@ class RecipeViewSet(ModelViewSet):
     ]
     filter_class = RecipeFilter
     serializer_class = RecipeSerializer
-    pagination_class = ModifiedPageNumberPagination
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        return Recipe.objects.with_related()
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -40,6 +55,55 @@ class RecipeViewSet(ModelViewSet):
         context['request'] = self.request
         return context
 
+    @action(
+        detail=False,
+        methods=['POST', ],
+        permission_classes=[IsAdminUser, ],
+        url_path='import',
+    )
+    def import_recipes(self, request):
+        importer = RecipeImporter(request.user)
+        stream = request.stream
+        lines = iter(stream.readline, b'') if stream is not None else []
+        result = importer.run(lines)
+        return Response(
+            result,
+            status=(
+                status.HTTP_201_CREATED if result['created']
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated, ],
+    )
+    def feed(self, request):
+        queryset, is_timeline = feed_queryset(request.user)
+        if is_timeline:
+            paginator = TimelineCursorPagination()
+            entries = paginator.paginate_queryset(
+                queryset.only('id', 'recipe_id', 'created'),
+                request,
+                view=self,
+            )
+            recipes = Recipe.objects.with_related().in_bulk(
+                [entry.recipe_id for entry in entries]
+            )
+            page = [
+                recipes[entry.recipe_id] for entry in entries
+                if entry.recipe_id in recipes
+            ]
+        else:
+            paginator = RecipeCursorPagination()
+            page = paginator.paginate_queryset(
+                queryset.with_related(),
+                request,
+                view=self,
+            )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         detail=True,
         methods=['GET', 'DELETE', ],
@@ -64,44 +128,64 @@ class RecipeViewSet(ModelViewSet):
             ShoppingList,
         )
 
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE', ],
+        permission_classes=[IsAuthenticated, ],
+        url_path='bulk/favorite',
+    )
+    def bulk_favorite(self, request):
+        return bulk_members_response(request, FAVORITES)
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE', ],
+        permission_classes=[IsAuthenticated, ],
+        url_path='bulk/shopping_cart',
+    )
+    def bulk_shopping_cart(self, request):
+        return bulk_members_response(request, SHOPPING_CART)
+
     def favorite_and_shopping_cart_performer(self, request, id, model):
         user = self.request.user
-        recipe = get_object_or_404(
-            Recipe,
-            id=id,
-        )
         if request.method == 'GET':
-            _, created = model.objects.get_or_create(
-                user=user,
-                recipe=recipe,
+            recipe = get_object_or_404(
+                Recipe,
+                id=id,
             )
-            if created:
-                recipe_srlz = ShortRecipeReadOnlySerializer(recipe)
-                return Response(
-                    recipe_srlz.data,
-                    status=status.HTTP_201_CREATED,
-                )
-            else:
+            try:
+                with transaction.atomic():
+                    model.objects.create(
+                        user=user,
+                        recipe=recipe,
+                    )
+            except IntegrityError:
                 return Response(
                     {'message': 'Рецепт уже был добавлен.'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-        else:
-            target_recipe = model.objects.filter(
-                user=user,
-                recipe=recipe,
+            recipe_srlz = ShortRecipeReadOnlySerializer(recipe)
+            return Response(
+                recipe_srlz.data,
+                status=status.HTTP_201_CREATED,
             )
-            if target_recipe.exists():
-                target_recipe.delete()
-                return Response(
-                    {'message': 'Рецепт удалён из списка.'},
-                    status=status.HTTP_204_NO_CONTENT,
-                )
-            else:
-                return Response(
-                    {'message': 'Рецепт и так не был добавлен.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        deleted, _ = model.objects.filter(
+            user=user,
+            recipe_id=id,
+        ).delete()
+        if deleted:
+            return Response(
+                {'message': 'Рецепт удалён из списка.'},
+                status=status.HTTP_204_NO_CONTENT,
+            )
+        get_object_or_404(
+            Recipe,
+            id=id,
+        )
+        return Response(
+            {'message': 'Рецепт и так не был добавлен.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
 
 class IngredientView(ReadOnlyModelViewSet):
@@ -115,6 +199,37 @@ class IngredientView(ReadOnlyModelViewSet):
     filter_class = IngredientFilter
     serializer_class = IngredientSerializer
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name and name.strip():
+            return Response(search_ingredients(name))
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return Response(get_or_build(INGREDIENTS, 'list', self.build_list))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Ключ кэша строится из разобранного id: сырой сегмент адреса может
+        # быть недопустимым ключом memcached, а "1", "01" и "001" дали бы
+        # разные записи.
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        if not 0 < pk < MAX_PK:
+            raise Http404
+        self.kwargs[self.lookup_field] = pk
+        return Response(get_or_build(
+            INGREDIENTS,
+            f'detail:{pk}',
+            self.build_detail,
+        ))
+
+    def build_list(self):
+        return list(self.get_serializer(self.get_queryset(), many=True).data)
+
+    def build_detail(self):
+        return dict(self.get_serializer(self.get_object()).data)
+
 
 class TagView(ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
@@ -123,6 +238,30 @@ class TagView(ReadOnlyModelViewSet):
     ]
     serializer_class = TagSerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(get_or_build(TAGS, 'list', self.build_list))
+
+    def build_list(self):
+        return list(self.get_serializer(self.get_queryset(), many=True).data)
+
+
+class ShoppingCartView(APIView):
+    permission_classes = [
+        IsAuthenticated,
+    ]
+
+    def get(self, request):
+        return Response([
+            {
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount,
+            }
+            for name, measurement_unit, amount in shopping_cart_ingredients(
+                request.user,
+            )
+        ])
+
 
 class DownloadShoppingCart(APIView):
     permission_classes = [
@@ -130,34 +269,25 @@ class DownloadShoppingCart(APIView):
     ]
 
     def get(self, request):
-        all_ingredients = IngredientInRecipe.objects.filter(
-            recipe__recipe_in_shopping_list__user=request.user
-        ).values_list(
-            'ingredient__name',
-            'ingredient__measurement_unit',
-            'amount'
-        )
-        ingredients_to_buy = dict()
-        for item in all_ingredients:
-            name = item[0]
-            if name in ingredients_to_buy:
-                ingredients_to_buy[name]['amount'] += item[2]
-            else:
-                ingredients_to_buy[name] = {
-                    'amount': item[2],
-                    'measurement_unit': item[1],
-                }
-        pre_result = [
-            f'{key}: {value["amount"]} {value["measurement_unit"]};\n'
-            for key, value in ingredients_to_buy.items()
-        ]
-        pre_result[-1] = pre_result[-1].replace(';', '.')
-        pre_result = ''.join(pre_result)
-        result = 'Для выбранных рецептов понадобится:\n' + pre_result
-        return HttpResponse(
-            result,
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in SHOPPING_CART_FORMATS:
+            return Response(
+                {
+                    'message': (
+                        'Допустимые форматы: '
+                        f'{", ".join(SHOPPING_CART_FORMATS)}.'
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        renderer, content_type = SHOPPING_CART_FORMATS[file_format]
+        ingredients = shopping_cart_ingredients(request.user).iterator()
+        return StreamingHttpResponse(
+            renderer(ingredients),
             headers={
-                'Content-Type': 'text/plain',
-                'Content-Disposition': 'attachment; filename="to_buy.txt"',
+                'Content-Type': content_type,
+                'Content-Disposition': (
+                    f'attachment; filename="to_buy.{file_format}"'
+                ),
             }
         )
@@ -0,0 +1,54 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.dataset import seed_dataset  # isort: skip
+
+# Однопиксельный GIF для тел запросов, где содержимое картинки не важно.
+IMAGE = (
+    'data:image/gif;base64,R0lGODdhAQABAIABAAAAAGNjYywAAAAAAQABAAACAkQBADs='
+)
+
+
+def image_bytes(image_format='PNG', size=(4, 4), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def data_uri(content, mime='image/png'):
+    return f'data:{mime};base64,{base64.b64encode(content).decode()}'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def dataset(db):
+    return seed_dataset(recipes=30, users=12, follows=5, favorites=5, cart=3)
+
+
+@pytest.fixture
+def client_for():
+    def make_client(user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    return make_client
@@ -0,0 +1,430 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.dataset import SEED_PASSWORD, seed_dataset  # isort: skip
+from recipes.models import Ingredient  # isort: skip
+from users.models import Follow  # isort: skip
+from .conftest import IMAGE  # isort: skip
+
+RECIPES = 200
+BASELINE = Path(__file__).with_name('perf_baseline.json')
+# Время ответа зависит от машины, поэтому сравнение с базовой линией
+# включается явно: PERF_LATENCY_MARGIN=0.5 допускает рост на 50%.
+# PERF_UPDATE_BASELINE=True перезаписывает базовую линию текущими замерами.
+LATENCY_MARGIN = os.environ.get('PERF_LATENCY_MARGIN')
+MIN_DELTA_MS = float(os.environ.get('PERF_MIN_DELTA_MS', default=5))
+ROUNDS = int(os.environ.get('PERF_ROUNDS', default=3))
+UPDATE_BASELINE = os.environ.get('PERF_UPDATE_BASELINE', default='') == 'True'
+
+
+def recipe_payload(state):
+    return {
+        'name': f'Проверка производительности {state["round"]}',
+        'text': 'Рецепт для проверки производительности.',
+        'cooking_time': 10,
+        'image': IMAGE,
+        'tags': state['tags'][:2],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 10}
+            for ingredient_id in state['ingredients'][:20]
+        ],
+    }
+
+
+def recipe_update_payload(state):
+    payload = recipe_payload(state)
+    payload['ingredients'] = [
+        {'id': ingredient_id, 'amount': 20}
+        for ingredient_id in state['ingredients'][10:30]
+    ]
+    return payload
+
+
+def bulk_recipes_payload(state):
+    return {'ids': state['bulk_recipes']}
+
+
+def bulk_authors_payload(state):
+    return {'ids': state['bulk_authors']}
+
+
+def user_payload(state):
+    return {
+        'email': f'perf-{state["round"]}@example.com',
+        'username': f'perf-{state["round"]}',
+        'first_name': 'Проверка',
+        'last_name': 'Производительности',
+        'password': SEED_PASSWORD,
+    }
+
+
+def login_payload(state):
+    return {'email': state['guest'].email, 'password': SEED_PASSWORD}
+
+
+def import_payload(state):
+    payload = recipe_payload(state)
+    return '\n'.join(
+        json.dumps({**payload, 'name': f'{payload["name"]}, импорт {number}'})
+        for number in range(5)
+    )
+
+
+def set_password_payload(state):
+    return {
+        'current_password': SEED_PASSWORD,
+        'new_password': SEED_PASSWORD,
+    }
+
+
+# (название, метод, адрес, тело запроса, от чьего имени, куда сохранить ответ)
+ROUTES = (
+    ('tags: list', 'get', '/api/tags/', None, 'viewer', None),
+    ('tags: detail', 'get', '/api/tags/{tag}/', None, 'viewer', None),
+    ('ingredients: list', 'get', '/api/ingredients/', None, None, None),
+    (
+        'ingredients: search', 'get', '/api/ingredients/?name={prefix}',
+        None, None, None,
+    ),
+    (
+        'ingredients: detail', 'get', '/api/ingredients/{ingredient}/',
+        None, None, None,
+    ),
+    ('recipes: list, anonymous', 'get', '/api/recipes/', None, None, None),
+    ('recipes: list', 'get', '/api/recipes/', None, 'viewer', None),
+    (
+        'recipes: list, limit=50', 'get', '/api/recipes/?limit=50',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: list, page=2', 'get', '/api/recipes/?page=2',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: list, cursor', 'get', '/api/recipes/?cursor=',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: list, filtered', 'get',
+        '/api/recipes/?tags={tag_slug}&is_favorited=1&is_in_shopping_cart=1',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: search', 'get', '/api/recipes/?search=проверки рецепт',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: list, by author', 'get', '/api/recipes/?author={author}',
+        None, 'viewer', None,
+    ),
+    ('recipes: feed', 'get', '/api/recipes/feed/', None, 'viewer', None),
+    ('recipes: detail', 'get', '/api/recipes/{recipe}/', None, 'viewer', None),
+    (
+        'recipes: create', 'post', '/api/recipes/', recipe_payload,
+        'viewer', 'new_recipe',
+    ),
+    (
+        'recipes: update', 'patch', '/api/recipes/{new_recipe}/',
+        recipe_update_payload, 'viewer', None,
+    ),
+    (
+        'recipes: favorite', 'get', '/api/recipes/{new_recipe}/favorite/',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: unfavorite', 'delete',
+        '/api/recipes/{new_recipe}/favorite/', None, 'viewer', None,
+    ),
+    (
+        'recipes: add to cart', 'get',
+        '/api/recipes/{new_recipe}/shopping_cart/', None, 'viewer', None,
+    ),
+    (
+        'recipes: remove from cart', 'delete',
+        '/api/recipes/{new_recipe}/shopping_cart/', None, 'viewer', None,
+    ),
+    (
+        'recipes: bulk favorite', 'post', '/api/recipes/bulk/favorite/',
+        bulk_recipes_payload, 'viewer', None,
+    ),
+    (
+        'recipes: bulk unfavorite', 'delete', '/api/recipes/bulk/favorite/',
+        bulk_recipes_payload, 'viewer', None,
+    ),
+    (
+        'recipes: bulk add to cart', 'post',
+        '/api/recipes/bulk/shopping_cart/', bulk_recipes_payload, 'viewer',
+        None,
+    ),
+    (
+        'recipes: bulk remove from cart', 'delete',
+        '/api/recipes/bulk/shopping_cart/', bulk_recipes_payload, 'viewer',
+        None,
+    ),
+    (
+        'recipes: delete', 'delete', '/api/recipes/{new_recipe}/',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: import', 'post', '/api/recipes/import/', import_payload,
+        'admin', None,
+    ),
+    (
+        'recipes: shopping cart', 'get', '/api/recipes/shopping_cart/',
+        None, 'viewer', None,
+    ),
+    (
+        'recipes: download shopping cart', 'get',
+        '/api/recipes/download_shopping_cart/', None, 'viewer', None,
+    ),
+    (
+        'recipes: download shopping cart, csv', 'get',
+        '/api/recipes/download_shopping_cart/?file_format=csv',
+        None, 'viewer', None,
+    ),
+    ('users: list', 'get', '/api/users/', None, 'viewer', None),
+    (
+        'users: list, cursor', 'get', '/api/users/?cursor=',
+        None, 'viewer', None,
+    ),
+    (
+        'users: list, limit=50', 'get', '/api/users/?limit=50',
+        None, 'viewer', None,
+    ),
+    ('users: detail', 'get', '/api/users/{author}/', None, 'viewer', None),
+    ('users: me', 'get', '/api/users/me/', None, 'viewer', None),
+    (
+        'users: subscriptions', 'get', '/api/users/subscriptions/',
+        None, 'viewer', None,
+    ),
+    (
+        'users: subscriptions, limit=50', 'get',
+        '/api/users/subscriptions/?limit=50&recipes_limit=3',
+        None, 'viewer', None,
+    ),
+    (
+        'users: subscribe', 'get', '/api/users/{guest_id}/subscribe/',
+        None, 'viewer', None,
+    ),
+    (
+        'users: unsubscribe', 'delete', '/api/users/{guest_id}/subscribe/',
+        None, 'viewer', None,
+    ),
+    (
+        'users: bulk subscribe', 'post', '/api/users/bulk/subscribe/',
+        bulk_authors_payload, 'viewer', None,
+    ),
+    (
+        'users: bulk unsubscribe', 'delete', '/api/users/bulk/subscribe/',
+        bulk_authors_payload, 'viewer', None,
+    ),
+    ('users: create', 'post', '/api/users/', user_payload, None, None),
+    (
+        'users: set password', 'post', '/api/users/set_password/',
+        set_password_payload, 'guest_token', None,
+    ),
+    (
+        'auth: login', 'post', '/api/auth/token/login/', login_payload,
+        None, 'guest_token',
+    ),
+    (
+        'auth: logout', 'post', '/api/auth/token/logout/', None,
+        'guest_token', None,
+    ),
+)
+# Число SQL-запросов на эндпоинт после прогрева кэшей. Увеличивать только
+# вместе с изменением, которое объясняет новые запросы.
+QUERY_BUDGETS = {
+    'tags: list': 0,
+    'tags: detail': 1,
+    'ingredients: list': 0,
+    'ingredients: search': 0,
+    'ingredients: detail': 0,
+    'recipes: list, anonymous': 4,
+    # Первый список после отметок прошлого круга перечитывает три набора
+    # отметок: изменения сбрасывают их поколение, а не правят набор.
+    'recipes: list': 7,
+    'recipes: list, limit=50': 4,
+    'recipes: list, page=2': 4,
+    'recipes: list, cursor': 3,
+    'recipes: list, filtered': 4,
+    'recipes: search': 4,
+    'recipes: list, by author': 5,
+    'recipes: feed': 5,
+    'recipes: detail': 3,
+    'recipes: create': 15,
+    'recipes: update': 15,
+    'recipes: favorite': 4,
+    'recipes: unfavorite': 4,
+    'recipes: add to cart': 5,
+    'recipes: remove from cart': 6,
+    'recipes: bulk favorite': 5,
+    'recipes: bulk unfavorite': 4,
+    'recipes: bulk add to cart': 6,
+    'recipes: bulk remove from cart': 6,
+    'recipes: delete': 11,
+    # Пять строк. На SQLite Django 3.2 не возвращает id из bulk_create, и
+    # импорт сохраняет рецепты по одному; на PostgreSQL запросов меньше.
+    'recipes: import': 26,
+    'recipes: shopping cart': 1,
+    'recipes: download shopping cart': 1,
+    'recipes: download shopping cart, csv': 1,
+    'users: list': 2,
+    'users: list, cursor': 1,
+    'users: list, limit=50': 2,
+    'users: detail': 1,
+    'users: me': 0,
+    'users: subscriptions': 3,
+    'users: subscriptions, limit=50': 3,
+    'users: subscribe': 9,
+    'users: unsubscribe': 5,
+    'users: bulk subscribe': 7,
+    'users: bulk unsubscribe': 5,
+    'users: create': 5,
+    # Хэш пароля не кэшируется вместе с токеном и догружается для проверки.
+    'users: set password': 4,
+    'auth: login': 4,
+    'auth: logout': 4,
+}
+
+
+def request(route, state):
+    name, method, path, payload, auth, save_as = route
+    client = APIClient()
+    if auth is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {state[auth]}')
+    data = payload(state) if payload is not None else None
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        if isinstance(data, str):
+            response = client.generic(
+                method.upper(),
+                path.format(**state),
+                data,
+                content_type='application/x-ndjson',
+            )
+        else:
+            response = getattr(client, method)(
+                path.format(**state),
+                data,
+                format='json',
+            )
+        if response.streaming:
+            # Потоковый ответ выполняет запросы, пока его дочитывают.
+            b''.join(response.streaming_content)
+        elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code < 400, (
+        f'{name}: ответ {response.status_code} {response.content[:500]!r}'
+    )
+    if save_as == 'guest_token':
+        state[save_as] = response.json()['auth_token']
+    elif save_as is not None:
+        state[save_as] = response.json()['id']
+    return len(context.captured_queries), elapsed
+
+
+def prepare_state():
+    dataset = seed_dataset(recipes=RECIPES, users=25)
+    viewer, guest = dataset['authors'][:2]
+    admin = dataset['authors'][-1]
+    admin.is_staff = True
+    admin.save()
+    Follow.objects.filter(user=viewer, author=guest).delete()
+    ingredients = list(
+        Ingredient.objects.order_by('id').values_list('id', 'name')[:30]
+    )
+    return {
+        'viewer': Token.objects.create(user=viewer).key,
+        'admin': Token.objects.create(user=admin).key,
+        'guest': guest,
+        'guest_id': guest.id,
+        'tag': dataset['tags'][0].id,
+        'tag_slug': dataset['tags'][0].slug,
+        'tags': [tag.id for tag in dataset['tags']],
+        'ingredient': ingredients[0][0],
+        'ingredients': [ingredient_id for ingredient_id, _ in ingredients],
+        'prefix': ingredients[0][1][:2],
+        'recipe': dataset['recipe_ids'][0],
+        'author': dataset['authors'][2].id,
+        'bulk_recipes': dataset['recipe_ids'][-20:],
+        'bulk_authors': [author.id for author in dataset['authors'][2:12]],
+    }
+
+
+def measure(state):
+    queries = {}
+    timings = {route[0]: [] for route in ROUTES}
+    # Нулевой круг прогревает кэши и не учитывается.
+    for number in range(ROUNDS + 1):
+        state['round'] = number
+        token, _ = Token.objects.get_or_create(user=state['guest'])
+        state['guest_token'] = token.key
+        for route in ROUTES:
+            count, elapsed = request(route, state)
+            if number:
+                queries[route[0]] = max(queries.get(route[0], 0), count)
+                timings[route[0]].append(elapsed)
+    return {
+        name: {
+            'queries': queries[name],
+            'ms': round(statistics.median(timings[name]), 2),
+        }
+        for name in queries
+    }
+
+
+def latency_regressions(results, baseline, margin):
+    regressions = {}
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        limit = max(
+            expected['ms'] * (1 + margin),
+            expected['ms'] + MIN_DELTA_MS,
+        )
+        if result['ms'] > limit:
+            regressions[name] = (result['ms'], expected['ms'])
+    return regressions
+
+
+@pytest.mark.django_db(transaction=True)
+def test_every_route_stays_within_budget(media):
+    results = measure(prepare_state())
+    assert set(results) == set(QUERY_BUDGETS)
+    over_budget = {
+        name: (result['queries'], QUERY_BUDGETS[name])
+        for name, result in results.items()
+        if result['queries'] > QUERY_BUDGETS[name]
+    }
+    assert not over_budget, over_budget
+    if UPDATE_BASELINE:
+        BASELINE.write_text(
+            json.dumps(
+                {'recipes': RECIPES, 'endpoints': results},
+                ensure_ascii=False,
+                indent=2,
+            ) + '\n',
+            encoding='utf-8',
+        )
+    if LATENCY_MARGIN is None:
+        return
+    baseline = json.loads(BASELINE.read_text(encoding='utf-8'))
+    assert baseline['recipes'] == RECIPES, (
+        f'Базовая линия снята на {baseline["recipes"]} рецептах.'
+    )
+    regressions = latency_regressions(
+        results,
+        baseline['endpoints'],
+        float(LATENCY_MARGIN),
+    )
+    assert not regressions, regressions
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from config.async_views import (  # isort: skip
+    StreamingASGIHandler, run_in_thread_pool, stream_in_thread)
+from config.metrics import REQUESTS_IN_FLIGHT  # isort: skip
+from config.middleware import MetricsMiddleware  # isort: skip
+
+
+def test_stream_reads_every_chunk_in_one_worker_thread():
+    threads = []
+
+    def chunks():
+        for chunk in (b'a', b'b', b'c'):
+            threads.append(threading.get_ident())
+            yield chunk
+
+    async def consume():
+        return [chunk async for chunk in stream_in_thread(chunks())]
+
+    assert asyncio.run(consume()) == [b'a', b'b', b'c']
+    assert len(set(threads)) == 1
+    assert threads[0] != threading.get_ident()
+
+
+def test_handler_sends_thread_chunks_before_closing_the_body():
+    response = StreamingHttpResponse(iter(['a', 'b']))
+    response.stream_in_thread = True
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(StreamingASGIHandler().send_response(response, send))
+    assert messages[0]['type'] == 'http.response.start'
+    bodies = messages[1:]
+    assert b''.join(message.get('body', b'') for message in bodies) == b'ab'
+    assert all(message['more_body'] for message in bodies[:-1])
+    assert not bodies[-1].get('more_body', False)
+
+
+@pytest.mark.parametrize('method, shared_thread', (
+    ('get', False),
+    ('post', True),
+))
+def test_only_reads_leave_the_shared_thread(method, shared_thread):
+    threads = []
+
+    def view(request):
+        threads.append(threading.get_ident())
+        return HttpResponse()
+
+    async def call():
+        await run_in_thread_pool(view)(getattr(RequestFactory(), method)('/'))
+        return await sync_to_async(threading.get_ident)()
+
+    assert (asyncio.run(call()) == threads[0]) is shared_thread
+
+
+def test_requests_in_flight_is_released_when_the_view_raises(settings):
+    settings.METRICS_ENABLED = True
+
+    def get_response(request):
+        raise RuntimeError
+
+    middleware = MetricsMiddleware(get_response)
+    before = REQUESTS_IN_FLIGHT._value.get()
+    with pytest.raises(RuntimeError):
+        middleware(RequestFactory().get('/'))
+    assert REQUESTS_IN_FLIGHT._value.get() == before
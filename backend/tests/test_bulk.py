@@ -0,0 +1,95 @@
+import pytest
+
+from recipes import bulk  # isort: skip
+from recipes.counters import reconcile_counters  # isort: skip
+from recipes.memberships import FAVORITES, SHOPPING_CART  # isort: skip
+from recipes.models import (  # isort: skip
+    Favorite, ShoppingList, ShoppingListItem)
+from recipes.shopping_list import rebuild_shopping_lists  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+MODELS = {FAVORITES: Favorite, SHOPPING_CART: ShoppingList}
+
+
+@pytest.fixture(params=[True, False], ids=['returning', 'fallback'])
+def returning(request, monkeypatch):
+    monkeypatch.setattr(bulk, 'supports_returning', lambda: request.param)
+    return request.param
+
+
+def shopping_list_items():
+    return sorted(
+        ShoppingListItem.objects.values_list(
+            'user_id',
+            'ingredient_id',
+            'amount',
+        )
+    )
+
+
+def assert_aggregates_consistent():
+    assert not any(reconcile_counters().values())
+    items = shopping_list_items()
+    rebuild_shopping_lists()
+    assert items == shopping_list_items()
+
+
+def free_recipes(user, model, dataset, count):
+    taken = set(
+        model.objects.filter(user=user).values_list('recipe_id', flat=True)
+    )
+    return [pk for pk in dataset['recipe_ids'] if pk not in taken][:count]
+
+
+@pytest.mark.parametrize('kind', [FAVORITES, SHOPPING_CART])
+def test_rows_added_concurrently_are_not_applied_twice(
+    dataset,
+    monkeypatch,
+    returning,
+    kind,
+):
+    user = dataset['viewer']
+    model = MODELS[kind]
+    ids = free_recipes(user, model, dataset, 3)
+    find_targets = bulk.find_targets
+
+    def find_targets_racing(*args):
+        try:
+            return find_targets(*args)
+        finally:
+            # Параллельный запрос успевает добавить одну из строк.
+            model.objects.create(user=user, recipe_id=ids[0])
+
+    monkeypatch.setattr(bulk, 'find_targets', find_targets_racing)
+    outcomes = bulk.add_members(user, kind, ids + [0])
+    assert outcomes == {
+        ids[0]: bulk.EXISTS,
+        ids[1]: bulk.CREATED,
+        ids[2]: bulk.CREATED,
+        0: bulk.NOT_FOUND,
+    }
+    assert_aggregates_consistent()
+
+
+@pytest.mark.parametrize('kind', [FAVORITES, SHOPPING_CART])
+def test_bulk_remove_reports_and_applies_only_deleted_rows(
+    dataset,
+    returning,
+    kind,
+):
+    user = dataset['viewer']
+    model = MODELS[kind]
+    member = model.objects.filter(user=user).values_list(
+        'recipe_id',
+        flat=True,
+    ).first()
+    missing = free_recipes(user, model, dataset, 1)[0]
+    outcomes = bulk.remove_members(user, kind, [member, missing, 0])
+    assert outcomes == {
+        member: bulk.DELETED,
+        missing: bulk.MISSING,
+        0: bulk.NOT_FOUND,
+    }
+    assert not model.objects.filter(user=user, recipe_id=member).exists()
+    assert_aggregates_consistent()
@@ -0,0 +1,89 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from recipes.models import Favorite, Recipe, ShoppingList  # isort: skip
+from recipes.serializers import RecipeSerializer  # isort: skip
+from users.models import Follow  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def test_recipe_update_keeps_concurrent_counter_changes(dataset):
+    recipe = Recipe.objects.exclude(
+        recipe_in_favorite__user=dataset['viewer'],
+    ).exclude(
+        recipe_in_shopping_list__user=dataset['viewer'],
+    ).first()
+    stale = Recipe.objects.get(pk=recipe.pk)
+    # Пока идёт PATCH, другой запрос добавляет рецепт в избранное и корзину.
+    Favorite.objects.create(user=dataset['viewer'], recipe=recipe)
+    ShoppingList.objects.create(user=dataset['viewer'], recipe=recipe)
+    serializer = RecipeSerializer(
+        stale,
+        data={'name': 'Новое название'},
+        partial=True,
+    )
+    assert serializer.is_valid(), serializer.errors
+    serializer.save()
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert recipe.favorites_count == stale.favorites_count + 1
+    assert recipe.in_carts_count == stale.in_carts_count + 1
+
+
+def test_user_update_keeps_concurrent_counter_changes(dataset):
+    author = dataset['authors'][-1]
+    follower = next(
+        user for user in dataset['authors']
+        if user != author
+        and not Follow.objects.filter(user=user, author=author).exists()
+    )
+    stale = User.objects.get(pk=author.pk)
+    Follow.objects.create(user=follower, author=author)
+    Recipe.objects.create(
+        name='Новый рецепт',
+        text='Текст',
+        image='images/seed.jpg',
+        cooking_time=10,
+        author=author,
+    )
+    stale.first_name = 'Новое имя'
+    stale.save()
+    author.refresh_from_db()
+    assert author.first_name == 'Новое имя'
+    assert author.followers_count == stale.followers_count + 1
+    assert author.recipes_count == stale.recipes_count + 1
+
+
+def test_user_profile_patch_keeps_concurrent_counter_changes(
+    dataset,
+    client_for,
+    monkeypatch,
+):
+    author = dataset['authors'][-1]
+    follower = next(
+        user for user in dataset['authors']
+        if user != author
+        and not Follow.objects.filter(user=user, author=author).exists()
+    )
+    before = User.objects.get(pk=author.pk).followers_count
+    save = User.save
+
+    def save_racing(self, *args, **kwargs):
+        # Подписка фиксируется между чтением профиля и его сохранением.
+        if self.pk == author.pk:
+            Follow.objects.create(user=follower, author=author)
+        save(self, *args, **kwargs)
+
+    monkeypatch.setattr(User, 'save', save_racing)
+    response = client_for(author).patch(
+        f'/api/users/{author.id}/',
+        {'first_name': 'Новое имя'},
+        format='json',
+    )
+    assert response.status_code == 200
+    author.refresh_from_db()
+    assert author.first_name == 'Новое имя'
+    assert author.followers_count == before + 1
@@ -0,0 +1,131 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from recipes.feed import feed_queryset  # isort: skip
+from recipes.models import Recipe, TimelineEntry  # isort: skip
+from users.models import Follow  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def feed_settings(settings):
+    # Автор с двумя и более подписчиками считается популярным.
+    settings.FEED_FANOUT_LIMIT = 1
+    settings.FEED_BACKFILL_SIZE = 3
+    return settings
+
+
+@pytest.fixture
+def make_user():
+    def make(name):
+        return User.objects.create_user(
+            email=f'{name}@example.com',
+            username=name,
+            first_name=name,
+            last_name=name,
+            password='password',
+        )
+
+    return make
+
+
+def publish(author, count):
+    # Как и в запросе к API, автор читается из базы с актуальным числом
+    # подписчиков.
+    author = User.objects.get(pk=author.pk)
+    return [
+        Recipe.objects.create(
+            name=f'{author.username}-{number}',
+            text='Текст',
+            image='images/seed.jpg',
+            cooking_time=10,
+            author=author,
+        ).id
+        for number in range(count)
+    ]
+
+
+def timeline(user):
+    return set(
+        TimelineEntry.objects.filter(user=user).values_list(
+            'recipe_id',
+            flat=True,
+        )
+    )
+
+
+def newest_first(authors):
+    return list(
+        Recipe.objects.filter(author__in=authors).order_by(
+            '-created',
+            'id',
+        ).values_list('id', flat=True)
+    )
+
+
+def read_feed(client, limit=2):
+    ids = []
+    response = client.get('/api/recipes/feed/', {'limit': limit})
+    while True:
+        assert response.status_code == 200
+        ids += [recipe['id'] for recipe in response.data['results']]
+        if not response.data['next']:
+            return ids
+        response = client.get(response.data['next'])
+
+
+def test_publish_fans_out_to_followers_only(make_user):
+    author, reader, stranger = map(make_user, ('author', 'reader', 'other'))
+    Follow.objects.create(user=reader, author=author)
+    recipe_ids = publish(author, 2)
+    assert timeline(reader) == set(recipe_ids)
+    assert timeline(stranger) == set()
+
+
+def test_popular_author_is_not_fanned_out(make_user):
+    author, reader, fan = map(make_user, ('author', 'reader', 'fan'))
+    Follow.objects.create(user=reader, author=author)
+    Follow.objects.create(user=fan, author=author)
+    publish(author, 2)
+    assert timeline(reader) == set()
+    assert timeline(fan) == set()
+
+
+def test_follow_backfills_newest_recipes_and_unfollow_drops_them(make_user):
+    author, reader = make_user('author'), make_user('reader')
+    publish(author, 5)
+    follow = Follow.objects.create(user=reader, author=author)
+    assert timeline(reader) == set(newest_first([author])[:3])
+    follow.delete()
+    assert timeline(reader) == set()
+
+
+def test_timeline_feed_pages_through_fanned_out_recipes(
+    make_user,
+    client_for,
+):
+    reader = make_user('reader')
+    authors = [make_user('first'), make_user('second')]
+    for author in authors:
+        Follow.objects.create(user=reader, author=author)
+        publish(author, 3)
+    assert feed_queryset(reader)[1] is True
+    feed = read_feed(client_for(reader))
+    assert feed == newest_first(authors)
+
+
+def test_feed_pulls_popular_authors_on_read(make_user, client_for):
+    reader, fan = make_user('reader'), make_user('fan')
+    regular, popular = make_user('regular'), make_user('popular')
+    Follow.objects.create(user=reader, author=regular)
+    Follow.objects.create(user=reader, author=popular)
+    Follow.objects.create(user=fan, author=popular)
+    publish(regular, 3)
+    publish(popular, 4)
+    assert timeline(reader) == set(newest_first([regular]))
+    assert feed_queryset(reader)[1] is False
+    feed = read_feed(client_for(reader))
+    assert feed == newest_first([regular, popular])
@@ -0,0 +1,34 @@
+import pytest
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient  # isort: skip
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.filterwarnings(
+        'error::django.core.cache.backends.base.CacheKeyWarning',
+    ),
+]
+
+
+@pytest.mark.parametrize('segment', [
+    'a%20b',
+    'x' * 300,
+    '9' * 300,
+    '-1',
+    '0',
+    '1.5',
+])
+def test_malformed_ingredient_id_is_not_found(segment):
+    response = APIClient().get(f'/api/ingredients/{segment}/')
+    assert response.status_code == 404
+
+
+def test_equivalent_ids_share_one_cache_entry(django_assert_num_queries):
+    ingredient = Ingredient.objects.create(name='Соль', measurement_unit='г')
+    client = APIClient()
+    first = client.get(f'/api/ingredients/{ingredient.id}/')
+    assert first.status_code == 200
+    with django_assert_num_queries(0):
+        second = client.get(f'/api/ingredients/00{ingredient.id}/')
+    assert second.data == first.data
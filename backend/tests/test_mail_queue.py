@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.utils import timezone
+
+from users.mail_queue import claim_jobs, process_batch  # isort: skip
+from users.models import EmailJob, User  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def mail_settings(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.EMAIL_HOST_USER = 'noreply@example.com'
+    settings.EMAIL_QUEUE_MAX_ATTEMPTS = 3
+    settings.EMAIL_QUEUE_RETRY_DELAY_SECONDS = 60
+    settings.EMAIL_QUEUE_LEASE_SECONDS = 300
+    return settings
+
+
+@pytest.fixture
+def failing_backend(monkeypatch):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+    monkeypatch.setattr(locmem.EmailBackend, 'send_messages', send_messages)
+
+
+def make_jobs(count):
+    return [
+        EmailJob.objects.create(
+            subject=f'Письмо {number}',
+            body='Текст',
+            recipient=f'user-{number}@example.com',
+        ) for number in range(count)
+    ]
+
+
+def make_due(job):
+    EmailJob.objects.filter(pk=job.pk).update(
+        next_attempt_at=timezone.now() - timedelta(seconds=1),
+    )
+
+
+def test_registration_email_is_enqueued_on_commit(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        user = User.objects.create_user(
+            email='new@example.com',
+            username='new',
+            first_name='Новый',
+            last_name='Пользователь',
+            password='password',
+        )
+        assert not EmailJob.objects.exists()
+    assert len(callbacks) == 1
+    job = EmailJob.objects.get()
+    assert job.recipient == user.email
+    assert job.status == EmailJob.PENDING
+    assert mail.outbox == []
+
+
+def test_batch_is_sent_through_one_connection():
+    make_jobs(3)
+    assert process_batch(batch_size=2) == 2
+    assert len(mail.outbox) == 2
+    assert process_batch(batch_size=2) == 1
+    assert process_batch(batch_size=2) == 0
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        f'user-{number}@example.com' for number in range(3)
+    ]
+    assert set(
+        EmailJob.objects.values_list('status', 'attempts')
+    ) == {(EmailJob.SENT, 1)}
+
+
+def test_failed_send_is_retried_with_backoff(failing_backend):
+    job, = make_jobs(1)
+    for attempt, delay in ((1, 60), (2, 120)):
+        started = timezone.now()
+        assert process_batch() == 1
+        job.refresh_from_db()
+        assert job.status == EmailJob.PENDING
+        assert job.attempts == attempt
+        assert 'SMTP недоступен' in job.last_error
+        assert (
+            started + timedelta(seconds=delay)
+            <= job.next_attempt_at
+            <= timezone.now() + timedelta(seconds=delay)
+        )
+        # До следующей попытки письмо не выбирается.
+        assert process_batch() == 0
+        make_due(job)
+
+
+def test_job_is_dead_after_max_attempts(failing_backend):
+    job, = make_jobs(1)
+    for _ in range(3):
+        assert process_batch() == 1
+        make_due(job)
+    job.refresh_from_db()
+    assert job.status == EmailJob.DEAD
+    assert job.attempts == 3
+    assert process_batch() == 0
+    assert mail.outbox == []
+
+
+def test_claimed_jobs_are_leased_until_they_expire():
+    jobs = make_jobs(2)
+    started = timezone.now()
+    claimed = claim_jobs(10)
+    assert {job.pk for job in claimed} == {job.pk for job in jobs}
+    # Второй воркер не получает письма, пока аренда не истекла.
+    assert claim_jobs(10) == []
+    leases = EmailJob.objects.values_list('next_attempt_at', flat=True)
+    assert all(
+        lease >= started + timedelta(seconds=300) for lease in leases
+    )
+    make_due(jobs[0])
+    assert [job.pk for job in claim_jobs(10)] == [jobs[0].pk]
@@ -0,0 +1,51 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from recipes.cache import get_version  # isort: skip
+from recipes.memberships import (  # isort: skip
+    FAVORITES, is_member, membership_namespace)
+from recipes.models import Favorite  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def not_favorited_recipe(user, dataset):
+    favorited = set(
+        Favorite.objects.filter(user=user).values_list('recipe_id', flat=True)
+    )
+    return next(pk for pk in dataset['recipe_ids'] if pk not in favorited)
+
+
+def test_fill_racing_with_commit_is_not_served(
+    dataset,
+    django_capture_on_commit_callbacks,
+):
+    user = dataset['viewer']
+    recipe_id = not_favorited_recipe(user, dataset)
+    namespace = membership_namespace(FAVORITES, user.pk)
+    stale_key = f'{namespace}:{get_version(namespace)}'
+    stale_ids = frozenset(
+        Favorite.objects.filter(user=user).values_list('recipe_id', flat=True)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        Favorite.objects.create(user=user, recipe_id=recipe_id)
+    # Медленный запрос прочитал базу до фиксации и пишет в кэш после неё.
+    cache.set(stale_key, stale_ids)
+    assert is_member(User.objects.get(pk=user.pk), FAVORITES, recipe_id)
+
+
+def test_delete_is_visible_after_commit(
+    dataset,
+    django_capture_on_commit_callbacks,
+):
+    user = dataset['viewer']
+    recipe_id = not_favorited_recipe(user, dataset)
+    with django_capture_on_commit_callbacks(execute=True):
+        favorite = Favorite.objects.create(user=user, recipe_id=recipe_id)
+    assert is_member(User.objects.get(pk=user.pk), FAVORITES, recipe_id)
+    with django_capture_on_commit_callbacks(execute=True):
+        favorite.delete()
+    assert not is_member(User.objects.get(pk=user.pk), FAVORITES, recipe_id)
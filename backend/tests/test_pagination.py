@@ -0,0 +1,29 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+LISTS = ('/api/recipes/', '/api/users/', '/api/users/subscriptions/')
+
+
+@pytest.mark.parametrize('path', LISTS)
+def test_page_number_pagination_is_the_default(dataset, client_for, path):
+    response = client_for(dataset['viewer']).get(path, {'limit': 2})
+    assert response.status_code == 200
+    assert set(response.data) == {'count', 'next', 'previous', 'results'}
+    assert parse_qs(urlparse(response.data['next']).query)['page'] == ['2']
+
+
+@pytest.mark.parametrize('path', LISTS)
+def test_cursor_pagination_is_opt_in(dataset, client_for, path):
+    client = client_for(dataset['viewer'])
+    first = client.get(path, {'limit': 2, 'cursor': ''})
+    assert first.status_code == 200
+    assert 'count' not in first.data
+    second = client.get(first.data['next'])
+    assert second.status_code == 200
+    first_ids = {item['id'] for item in first.data['results']}
+    second_ids = {item['id'] for item in second.data['results']}
+    assert len(first_ids) == 2
+    assert second_ids and not first_ids & second_ids
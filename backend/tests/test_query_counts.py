@@ -0,0 +1,30 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = pytest.mark.django_db
+
+
+def count_queries(client, path):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(path)
+        assert response.status_code == 200
+    return len(context)
+
+
+@pytest.mark.parametrize('path', [
+    '/api/recipes/?page=1&limit={limit}',
+    '/api/users/?page=1&limit={limit}',
+    '/api/users/subscriptions/?page=1&limit={limit}',
+])
+def test_list_query_count_does_not_depend_on_page_size(
+    dataset,
+    client_for,
+    path,
+):
+    client = client_for(dataset['viewer'])
+    client.get(path.format(limit=1))
+    assert count_queries(client, path.format(limit=2)) == count_queries(
+        client,
+        path.format(limit=10),
+    )
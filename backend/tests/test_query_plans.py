@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection, transaction
+
+from recipes.dataset import seed_dataset  # isort: skip
+from recipes.management.commands.check_query_plans import (  # isort: skip
+    LARGE_TABLES, feed_queries, large_tables, sequential_scans)
+
+pytestmark = pytest.mark.django_db
+
+MIN_ROWS = 1000
+
+
+@pytest.fixture(scope='module')
+def plans(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), transaction.atomic():
+        dataset = seed_dataset(recipes=2000, users=100)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        tables = large_tables(MIN_ROWS)
+        queries = feed_queries(
+            dataset['viewer'],
+            dataset['authors'],
+            dataset['tags'],
+        )
+        scans = {
+            title: sequential_scans(queryset.explain(), tables)
+            for title, queryset in queries.items()
+        }
+        transaction.set_rollback(True)
+    return tables, scans
+
+
+def test_dataset_fills_large_tables(plans):
+    tables, _ = plans
+    assert set(tables) == set(LARGE_TABLES)
+
+
+def test_hot_queries_do_not_scan_large_tables(plans):
+    _, scans = plans
+    assert {title: found for title, found in scans.items() if found} == {}
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import call_command
+from PIL import Image
+
+from recipes.images import VARIANTS, variant_name  # isort: skip
+from recipes.models import Recipe  # isort: skip
+from .conftest import data_uri, image_bytes  # isort: skip
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def png_data_uri(color):
+    return data_uri(image_bytes(size=(40, 40), color=color))
+
+
+def test_broken_image_is_marked_failed_and_worker_continues(dataset, media):
+    broken_id, valid_id = dataset['recipe_ids'][:2]
+    Image.new('RGB', (40, 40), 'red').save(media / 'valid.png')
+    Recipe.objects.exclude(
+        id__in=(broken_id, valid_id),
+    ).update(image_variants_ready=True)
+    Recipe.objects.filter(id=broken_id).update(image='../../etc/passwd')
+    Recipe.objects.filter(id=valid_id).update(image='valid.png')
+    call_command('generate_recipe_images', once=True)
+    broken = Recipe.objects.get(id=broken_id)
+    assert broken.image_variants_failed
+    assert not broken.image_variants_ready
+    assert Recipe.objects.get(id=valid_id).image_variants_ready
+
+
+def test_replacing_image_deletes_old_variants(dataset, media, client_for):
+    author = dataset['viewer']
+    client = client_for(author)
+    recipe_id = Recipe.objects.filter(author=author).values_list(
+        'id',
+        flat=True,
+    ).first()
+    Recipe.objects.exclude(id=recipe_id).update(image_variants_ready=True)
+    assert client.patch(
+        f'/api/recipes/{recipe_id}/',
+        {'image': png_data_uri('red')},
+        format='json',
+    ).status_code == 200
+    call_command('generate_recipe_images', once=True)
+    recipe = Recipe.objects.get(id=recipe_id)
+    assert recipe.image_variants_ready
+    old_variants = [
+        media / variant_name(recipe.image.name, variant)
+        for variant in VARIANTS
+    ]
+    assert all(path.exists() for path in old_variants)
+    assert client.patch(
+        f'/api/recipes/{recipe_id}/',
+        {'image': png_data_uri('blue')},
+        format='json',
+    ).status_code == 200
+    assert not any(path.exists() for path in old_variants)
+    assert not Recipe.objects.get(id=recipe_id).image_variants_ready
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from django.db import DatabaseError
+
+from recipes.importer import RecipeImporter  # isort: skip
+from recipes.models import Ingredient, Recipe, Tag  # isort: skip
+from .conftest import data_uri, image_bytes  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+
+def row(image, cooking_time=5, amount=1):
+    return json.dumps({
+        'name': 'Импортированный рецепт',
+        'text': 'Рецепт из NDJSON.',
+        'cooking_time': cooking_time,
+        'image': image,
+        'tags': [Tag.objects.values_list('id', flat=True).first()],
+        'ingredients': [{
+            'id': Ingredient.objects.values_list('id', flat=True).first(),
+            'amount': amount,
+        }],
+    })
+
+
+def run_import(dataset, *images):
+    importer = RecipeImporter(dataset['viewer'])
+    return importer.run([row(image) for image in images])
+
+
+def uploaded_files(media):
+    return [path for path in media.rglob('*') if path.is_file()]
+
+
+@pytest.mark.parametrize('image', [
+    '../../etc/passwd',
+    '/etc/passwd',
+    'images/../../settings.py',
+    'images/missing.jpg',
+    'other/existing.png',
+    data_uri(image_bytes(), mime='image/svg+xml'),
+    data_uri(b'not an image at all'),
+    data_uri(image_bytes('PNG'), mime='image/jpeg'),
+    'data:image/png;base64,%%%',
+])
+def test_invalid_image_is_rejected(dataset, media, image):
+    (media / 'other').mkdir()
+    (media / 'other' / 'existing.png').write_bytes(image_bytes())
+    result = run_import(dataset, image)
+    assert result['created'] == 0
+    assert result['errors'][0]['error'].startswith('image:')
+    assert uploaded_files(media) == [media / 'other' / 'existing.png']
+
+
+def test_valid_images_are_imported(dataset, media):
+    (media / 'images').mkdir()
+    (media / 'images' / 'existing.png').write_bytes(image_bytes())
+    result = run_import(
+        dataset,
+        'images/existing.png',
+        data_uri(image_bytes('JPEG'), mime='image/jpeg'),
+    )
+    assert result == {'created': 2, 'errors': []}
+    names = set(
+        Recipe.objects.filter(
+            name='Импортированный рецепт',
+        ).values_list('image', flat=True)
+    )
+    assert 'images/existing.png' in names
+    assert any(name.endswith('.jpg') for name in names)
+
+
+def test_failed_chunk_removes_its_uploaded_files(dataset, media, monkeypatch):
+    def fail(self, prepared):
+        raise DatabaseError('сбой записи')
+
+    monkeypatch.setattr(RecipeImporter, 'write', fail)
+    result = run_import(dataset, data_uri(image_bytes()))
+    assert result['created'] == 0
+    assert result['errors'][0]['error'] == 'сбой записи'
+    assert uploaded_files(media) == []
+
+
+@pytest.mark.parametrize('field, value', [
+    ('cooking_time', 2.5),
+    ('cooking_time', '2.5'),
+    ('cooking_time', True),
+    ('cooking_time', 'пять'),
+    ('cooking_time', None),
+    ('amount', 1.7),
+    ('amount', False),
+    ('amount', [1]),
+])
+def test_non_integer_numbers_are_rejected(dataset, media, field, value):
+    importer = RecipeImporter(dataset['viewer'])
+    result = importer.run([
+        row(data_uri(image_bytes()), **{field: value}),
+    ])
+    assert result['created'] == 0
+    assert 'целым числом' in result['errors'][0]['error']
+    assert not Recipe.objects.filter(name='Импортированный рецепт').exists()
+
+
+def test_integral_numbers_are_imported(dataset, media):
+    importer = RecipeImporter(dataset['viewer'])
+    result = importer.run([
+        row(data_uri(image_bytes()), cooking_time='7', amount=3.0),
+    ])
+    assert result == {'created': 1, 'errors': []}
+    recipe = Recipe.objects.get(name='Импортированный рецепт')
+    assert recipe.cooking_time == 7
+    assert recipe.all_ingredients.get().amount == 3
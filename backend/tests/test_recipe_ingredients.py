@@ -0,0 +1,49 @@
+import pytest
+
+from recipes.models import Ingredient, Tag  # isort: skip
+from .conftest import IMAGE  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+
+def recipe_payload(amount):
+    return {
+        'name': 'Проверка количества',
+        'text': 'Рецепт для проверки количества ингредиентов.',
+        'cooking_time': 10,
+        'image': IMAGE,
+        'tags': [Tag.objects.values_list('id', flat=True).first()],
+        'ingredients': [
+            {
+                'id': Ingredient.objects.values_list('id', flat=True).first(),
+                'amount': amount,
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize('amount', [1.5, '1.5', 'много'])
+def test_non_integer_amount_is_rejected(dataset, client_for, amount):
+    response = client_for(dataset['viewer']).post(
+        '/api/recipes/',
+        recipe_payload(amount),
+        format='json',
+    )
+    assert response.status_code == 400
+    assert 'ingredients' in response.data
+
+
+@pytest.mark.parametrize('amount', [2, '2', 2.0])
+def test_integer_amount_is_accepted(
+    dataset,
+    client_for,
+    media,
+    amount,
+):
+    response = client_for(dataset['viewer']).post(
+        '/api/recipes/',
+        recipe_payload(amount),
+        format='json',
+    )
+    assert response.status_code == 201
+    assert response.data['ingredients'][0]['amount'] == 2
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+
+from config.async_views import StreamingASGIHandler  # isort: skip
+from config.middleware import RequestTimingMiddleware  # isort: skip
+from recipes.models import Tag  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def timing_settings(settings):
+    settings.REQUEST_TIMING_ENABLED = True
+    settings.REQUEST_TIMING_SLOW_MS = 10 ** 6
+    settings.REQUEST_TIMING_SLOW_QUERIES = 2
+    return settings
+
+
+def test_streaming_body_queries_reach_the_slow_request_log(
+    timing_settings,
+    caplog,
+):
+    def rows():
+        for _ in range(3):
+            yield f'{Tag.objects.count()}\n'
+
+    middleware = RequestTimingMiddleware(
+        lambda request: StreamingHttpResponse(rows()),
+    )
+    response = middleware(RequestFactory().get('/api/recipes/download/'))
+    assert 'db;dur=0.0;desc="0 queries"' in response['Server-Timing']
+    assert not caplog.records
+    assert b''.join(response.streaming_content) == b'0\n0\n0\n'
+    entry, = (json.loads(record.message) for record in caplog.records)
+    assert entry['queries'] == 3
+    assert entry['render_ms'] >= 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_streaming_body_read_in_a_thread_is_counted(timing_settings, caplog):
+    def rows():
+        for _ in range(3):
+            yield f'{Tag.objects.count()}\n'
+
+    middleware = RequestTimingMiddleware(
+        lambda request: StreamingHttpResponse(rows()),
+    )
+    response = middleware(RequestFactory().get('/api/recipes/download/'))
+    response.stream_in_thread = True
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(StreamingASGIHandler().send_response(response, send))
+    assert b''.join(message.get('body', b'') for message in messages) == (
+        b'0\n0\n0\n'
+    )
+    entry, = (json.loads(record.message) for record in caplog.records)
+    assert entry['queries'] == 3
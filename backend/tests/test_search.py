@@ -0,0 +1,28 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe  # isort: skip
+from recipes.search import has_sqlite_fts, search_recipes  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Проверяется полнотекстовый поиск SQLite.',
+)
+def test_fts_lookup_is_not_repeated_per_search(dataset):
+    Recipe.objects.filter(pk=dataset['recipe_ids'][0]).update(
+        name='Борщ украинский',
+    )
+    assert has_sqlite_fts(Recipe.objects.db)
+    with CaptureQueriesContext(connection) as context:
+        for _ in range(3):
+            found = list(search_recipes(Recipe.objects.all(), 'борщ'))
+            assert [recipe.id for recipe in found] == [
+                dataset['recipe_ids'][0],
+            ]
+    assert not any(
+        'sqlite_master' in query['sql'] for query in context.captured_queries
+    )
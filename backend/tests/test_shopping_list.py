@@ -0,0 +1,147 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+from recipes.models import (  # isort: skip
+    Ingredient, IngredientInRecipe, Recipe, ShoppingList, ShoppingListItem)
+from recipes.shopping_list import rebuild_shopping_lists  # isort: skip
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def assert_matches_rebuild():
+    items = sorted(
+        ShoppingListItem.objects.values_list(
+            'user_id',
+            'ingredient_id',
+            'amount',
+        )
+    )
+    assert items
+    rebuild_shopping_lists()
+    assert items == sorted(
+        ShoppingListItem.objects.values_list(
+            'user_id',
+            'ingredient_id',
+            'amount',
+        )
+    )
+
+
+@pytest.fixture
+def shared_recipe(dataset):
+    # Рецепт зрителя лежит в корзинах нескольких пользователей, так что
+    # его изменения затрагивают чужие списки покупок.
+    recipe = Recipe.objects.get(pk=dataset['recipe_ids'][0])
+    Recipe.objects.filter(pk=recipe.pk).update(author=dataset['viewer'])
+    for user in dataset['authors'][1:5]:
+        ShoppingList.objects.get_or_create(user=user, recipe=recipe)
+    return recipe
+
+
+def new_ingredients(recipe, count):
+    return list(
+        Ingredient.objects.exclude(
+            ingredient_in_recipe__recipe=recipe,
+        ).values_list('id', flat=True)[:count]
+    )
+
+
+def test_single_add_and_remove_keep_the_aggregate(dataset, client_for):
+    user = dataset['viewer']
+    recipe_id = Recipe.objects.exclude(
+        recipe_in_shopping_list__user=user,
+    ).values_list('id', flat=True).first()
+    client = client_for(user)
+    path = f'/api/recipes/{recipe_id}/shopping_cart/'
+    assert client.get(path).status_code == 201
+    assert_matches_rebuild()
+    assert client.delete(path).status_code == 204
+    assert_matches_rebuild()
+
+
+def test_recipe_ingredients_patch_keeps_the_aggregate(
+    dataset,
+    client_for,
+    shared_recipe,
+):
+    kept = IngredientInRecipe.objects.filter(recipe=shared_recipe).first()
+    added, = new_ingredients(shared_recipe, 1)
+    response = client_for(dataset['viewer']).patch(
+        f'/api/recipes/{shared_recipe.id}/',
+        {
+            'ingredients': [
+                {'id': kept.ingredient_id, 'amount': kept.amount + 7},
+                {'id': added, 'amount': 3},
+            ],
+        },
+        format='json',
+    )
+    assert response.status_code == 200, response.data
+    assert_matches_rebuild()
+
+
+def test_admin_inline_edit_keeps_the_aggregate(dataset, shared_recipe):
+    admin = User.objects.create_superuser(
+        email='admin@example.com',
+        username='admin',
+        first_name='Админ',
+        last_name='Админов',
+        password='password',
+    )
+    client = Client()
+    client.force_login(admin)
+    rows = list(IngredientInRecipe.objects.filter(recipe=shared_recipe))
+    added, = new_ingredients(shared_recipe, 1)
+    prefix = 'all_ingredients'
+    data = {
+        'name': shared_recipe.name,
+        'text': shared_recipe.text,
+        'cooking_time': shared_recipe.cooking_time,
+        'author': dataset['viewer'].id,
+        'tags': list(shared_recipe.tags.values_list('id', flat=True)),
+        f'{prefix}-TOTAL_FORMS': len(rows) + 1,
+        f'{prefix}-INITIAL_FORMS': len(rows),
+        f'{prefix}-MIN_NUM_FORMS': 0,
+        f'{prefix}-MAX_NUM_FORMS': 1000,
+    }
+    for number, row in enumerate(rows):
+        data.update({
+            f'{prefix}-{number}-id': row.id,
+            f'{prefix}-{number}-recipe': shared_recipe.id,
+            f'{prefix}-{number}-ingredient': row.ingredient_id,
+            # Первая строка удаляется, вторая меняет количество.
+            f'{prefix}-{number}-amount': row.amount + number,
+            f'{prefix}-{number}-DELETE': 'on' if number == 0 else '',
+        })
+    data.update({
+        f'{prefix}-{len(rows)}-recipe': shared_recipe.id,
+        f'{prefix}-{len(rows)}-ingredient': added,
+        f'{prefix}-{len(rows)}-amount': 11,
+    })
+    response = client.post(
+        f'/admin/recipes/recipe/{shared_recipe.id}/change/',
+        data,
+    )
+    assert response.status_code == 302, response.context['errors']
+    assert IngredientInRecipe.objects.filter(
+        recipe=shared_recipe,
+        ingredient_id=added,
+    ).exists()
+    assert not IngredientInRecipe.objects.filter(pk=rows[0].pk).exists()
+    assert_matches_rebuild()
+
+
+def test_recipe_deletion_keeps_the_aggregate(
+    dataset,
+    client_for,
+    shared_recipe,
+):
+    response = client_for(dataset['viewer']).delete(
+        f'/api/recipes/{shared_recipe.id}/',
+    )
+    assert response.status_code == 204
+    assert not ShoppingList.objects.filter(recipe=shared_recipe).exists()
+    assert_matches_rebuild()
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.cache import get_version  # isort: skip
+from users.authentication import (  # isort: skip
+    CachedTokenAuthentication, token_namespace)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def token(dataset):
+    return Token.objects.create(user=dataset['authors'][1])
+
+
+def test_cached_user_is_a_projection_without_password(token):
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    entry = cache.get(token_namespace(token.key))
+    assert set(entry['user']) >= {'id', 'email', 'is_active', 'is_staff'}
+    assert token.user.password.encode() not in pickle.dumps(entry)
+    user, cached_token = authentication.authenticate_credentials(token.key)
+    assert user.pk == token.user_id
+    assert user.email == token.user.email
+    assert cached_token.key == token.key
+    assert user.check_password('seed-password')
+
+
+def test_fill_racing_with_logout_is_not_served(
+    token,
+    django_capture_on_commit_callbacks,
+):
+    key = token.key
+    namespace = token_namespace(key)
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(key)
+    stale_entry = cache.get(namespace)
+    stale_entry['version'] = get_version(namespace)
+    with django_capture_on_commit_callbacks(execute=True):
+        token.delete()
+    # Медленный запрос прочитал токен до выхода и пишет в кэш после него.
+    cache.set(namespace, stale_entry)
+    with pytest.raises(AuthenticationFailed):
+        authentication.authenticate_credentials(key)
+
+
+def test_deactivated_user_is_rejected_after_commit(
+    token,
+    django_capture_on_commit_callbacks,
+):
+    authentication = CachedTokenAuthentication()
+    authentication.authenticate_credentials(token.key)
+    user = token.user
+    user.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    with pytest.raises(AuthenticationFailed):
+        authentication.authenticate_credentials(token.key)
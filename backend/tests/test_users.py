@@ -0,0 +1,44 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def test_user_cannot_change_another_users_profile(dataset, client_for):
+    attacker, victim = dataset['authors'][:2]
+    response = client_for(attacker).patch(
+        f'/api/users/{victim.id}/',
+        {'email': 'hijack@example.com', 'first_name': 'Взломан'},
+        format='json',
+    )
+    assert response.status_code == 403
+    victim.refresh_from_db()
+    assert victim.email != 'hijack@example.com'
+    assert victim.first_name != 'Взломан'
+
+
+def test_email_and_counters_are_read_only_for_the_owner(dataset, client_for):
+    user = User.objects.get(pk=dataset['viewer'].pk)
+    response = client_for(user).patch(
+        f'/api/users/{user.id}/',
+        {
+            'email': 'changed@example.com',
+            'recipes_count': 1000,
+            'followers_count': 1000,
+            'first_name': 'Новое имя',
+        },
+        format='json',
+    )
+    assert response.status_code == 200
+    refreshed = User.objects.get(pk=user.pk)
+    assert refreshed.email == user.email
+    assert refreshed.recipes_count == user.recipes_count
+    assert refreshed.followers_count == user.followers_count
+    assert refreshed.first_name == 'Новое имя'
+
+
+def test_profiles_stay_public(dataset, client):
+    author = dataset['authors'][1]
+    assert client.get(f'/api/users/{author.id}/').status_code == 200
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
-from .models import Follow
+from config.paginators import EstimatedCountPaginator  # isort: skip
+from .models import EmailJob, Follow  # isort: skip
 
 User = get_user_model()
 
@@ -12,6 +13,12 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
         'email',
+        'recipes_count',
+        'followers_count',
+    )
+    readonly_fields = (
+        'recipes_count',
+        'followers_count',
     )
     list_display_links = (
         'username',
@@ -23,6 +30,8 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'email',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -33,11 +42,40 @@ class FollowAdmin(admin.ModelAdmin):
     list_display_links = (
         'user',
     )
+    list_select_related = (
+        'user',
+        'author',
+    )
     search_fields = (
+        'user__email',
+        'author__email',
+    )
+    autocomplete_fields = (
         'user',
         'author',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class EmailJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'recipient',
+        'status',
+        'attempts',
+        'next_attempt_at',
+    )
+    list_filter = (
+        'status',
+    )
+    search_fields = (
+        'recipient',
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(EmailJob, EmailJobAdmin)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.db.models import signals
+        from rest_framework.authtoken.models import Token
+
+        from .authentication import token_deleted, user_changed
+        from .models import User
+
+        signals.post_delete.connect(token_deleted, sender=Token)
+        signals.post_save.connect(user_changed, sender=User)
@@ -0,0 +1,116 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.cache import (  # isort: skip
+    bump_version, cache_stats, get_version, version_key)
+
+User = get_user_model()
+
+AUTH_TOKENS = 'auth_tokens'
+# В кэш попадает только то, что нужно для проверки прав: без хэша пароля
+# и без счётчиков, которые меняются через UPDATE без сигналов. Остальные
+# поля догружаются отдельным запросом при обращении к ним.
+USER_FIELDS = (
+    'id',
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+def token_namespace(key):
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def cached_credentials(key, entry):
+    # from_db ждёт значения в порядке полей модели.
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in entry['user']
+    ]
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        fields,
+        [entry['user'][field] for field in fields],
+    )
+    token = Token.from_db(DEFAULT_DB_ALIAS, ('key', 'user_id'), (key, user.pk))
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        namespace = token_namespace(key)
+        cached = cache.get_many([namespace, version_key(namespace)])
+        entry = cached.get(namespace)
+        if entry is not None and entry['version'] == cached.get(
+            version_key(namespace),
+        ):
+            cache_stats.add(AUTH_TOKENS, 'hit')
+            return cached_credentials(key, entry)
+        cache_stats.add(AUTH_TOKENS, 'miss')
+        # Версия читается до выборки: если выход или смена пароля
+        # зафиксируются, пока идёт запрос к базе, они сменят версию, и
+        # записанная ниже запись не пройдёт проверку.
+        version = get_version(namespace)
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').only(
+                'key',
+                'user_id',
+                *(f'user__{field}' for field in USER_FIELDS),
+            ).get(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        cache.set(
+            namespace,
+            {
+                'version': version,
+                'user': {
+                    field: getattr(token.user, field)
+                    for field in USER_FIELDS
+                },
+            },
+            getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60),
+        )
+        return token.user, token
+
+
+def bump_versions(namespaces):
+    for namespace in namespaces:
+        bump_version(namespace)
+
+
+def forget_tokens(keys):
+    namespaces = [token_namespace(key) for key in keys]
+    if namespaces:
+        transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+def token_deleted(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+def user_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    forget_tokens(
+        Token.objects.filter(user_id=instance.pk).values_list(
+            'key',
+            flat=True,
+        )
+    )
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailJob  # isort: skip
+
+
+def get_queue_setting(name, default):
+    return getattr(settings, f'EMAIL_QUEUE_{name}', default)
+
+
+def claim_jobs(batch_size):
+    now = timezone.now()
+    lease_until = now + timedelta(
+        seconds=get_queue_setting('LEASE_SECONDS', 300)
+    )
+    with transaction.atomic():
+        jobs = list(
+            EmailJob.objects.select_for_update(
+                skip_locked=True,
+            ).filter(
+                status=EmailJob.PENDING,
+                next_attempt_at__lte=now,
+            )[:batch_size]
+        )
+        EmailJob.objects.filter(
+            id__in=[job.id for job in jobs],
+        ).update(next_attempt_at=lease_until)
+    return jobs
+
+
+def schedule_retry(job, error):
+    job.attempts += 1
+    job.last_error = repr(error)
+    if job.attempts >= get_queue_setting('MAX_ATTEMPTS', 5):
+        job.status = EmailJob.DEAD
+        return
+    delay = get_queue_setting('RETRY_DELAY_SECONDS', 60) * 2 ** (
+        job.attempts - 1
+    )
+    job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+
+def send_jobs(jobs):
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for job in jobs:
+            schedule_retry(job, error)
+        return
+    try:
+        for job in jobs:
+            message = EmailMessage(
+                job.subject,
+                job.body,
+                settings.EMAIL_HOST_USER,
+                [job.recipient],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                schedule_retry(job, error)
+            else:
+                job.attempts += 1
+                job.status = EmailJob.SENT
+    finally:
+        connection.close()
+
+
+def process_batch(batch_size=None):
+    if batch_size is None:
+        batch_size = get_queue_setting('BATCH_SIZE', 50)
+    jobs = claim_jobs(batch_size)
+    if jobs:
+        send_jobs(jobs)
+        EmailJob.objects.bulk_update(
+            jobs,
+            ['status', 'attempts', 'next_attempt_at', 'last_error'],
+        )
+    return len(jobs)
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mail_queue import process_batch  # isort: skip
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EmailJob.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Количество писем, отправляемых за одно соединение.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, если очередь пуста.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = process_batch(options['batch_size'])
+            while sent:
+                self.stdout.write(f'Обработано писем: {sent}')
+                sent = process_batch(options['batch_size'])
+            if options['once']:
+                return
+            time.sleep(options['interval'])
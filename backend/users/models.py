@@ -1,13 +1,12 @@
-import asyncio
-
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.db.models import signals
+from django.utils import timezone
 
-from .async_elements import AsyncEmailSender
+from config.counters import CounterFieldsMixin  # isort: skip
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     first_name = models.CharField(
         verbose_name='Имя',
         max_length=150,
@@ -20,12 +19,26 @@ class User(AbstractUser):
         max_length=254,
         unique=True
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписчиков',
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'username',
         'first_name',
         'last_name',
     ]
+    counter_fields = (
+        'recipes_count',
+        'followers_count',
+    )
 
     class Meta:
         verbose_name = 'пользователя'
@@ -66,10 +79,79 @@ class Follow(models.Model):
         return f'{self.user} подписан на {self.author}'
 
 
+class EmailJob(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не удалось отправить'),
+    )
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='email_job_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Письмо "{self.subject}" для {self.recipient}'
+
+
+def enqueue_registration_email(user):
+    EmailJob.objects.create(
+        subject='Уведомление о прохождении регистрации на FDGRM',
+        body=(
+            f'Привет, {user.username}! Ты зарегистрировался на '
+            'нашем сайте. Добро пожаловать!'
+        ),
+        recipient=user.email,
+    )
+
+
 def user_post_save(sender, instance, created, *args, **kwargs):
     if created:
-        sender = AsyncEmailSender(instance)
-        asyncio.run(sender.main())
+        transaction.on_commit(lambda: enqueue_registration_email(instance))
 
 
 signals.post_save.connect(user_post_save, sender=User)
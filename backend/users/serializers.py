@@ -1,20 +1,23 @@
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 
-from .models import Follow
+from recipes.memberships import FOLLOWING, is_member  # isort: skip
 
 
 class ModifiedDjoserUserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField(source='*')
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + ('is_subscribed', )
+        fields = UserSerializer.Meta.fields + (
+            'is_subscribed',
+            'recipes_count',
+            'followers_count',
+        )
+        read_only_fields = UserSerializer.Meta.read_only_fields + (
+            'recipes_count',
+            'followers_count',
+        )
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        if not request.user.is_authenticated:
-            return False
-        return Follow.objects.filter(
-            user=request.user,
-            author=obj
-        ).exists()
+        return is_member(request.user, FOLLOWING, obj.id)
@@ -1,32 +1,79 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.expressions import RawSQL, Window
+from django.db.models.functions import RowNumber
 
 from recipes.models import Recipe  # isort: skip
-from recipes.serializers import RecipeSerializer  # isort: skip
+from recipes.serializers import ShortRecipeReadOnlySerializer  # isort: skip
 from .serializers import ModifiedDjoserUserSerializer  # isort: skip
 
 
 User = get_user_model()
 
 
-def subscribe_context(request, author, recipes_limit):
-    author_srlz = ModifiedDjoserUserSerializer(
-        author,
-        context={'request': request},
-    )
-    all_recipes_by_author = Recipe.objects.filter(
-        author=author
+def parse_recipes_limit(recipes_limit):
+    if recipes_limit is not None and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+def subscribed_authors(user):
+    return User.objects.filter(followers__user=user).order_by('id')
+
+
+def latest_recipes_by_authors(authors, recipes_limit):
+    if not authors:
+        return Recipe.objects.none()
+    recipes = Recipe.objects.filter(author__in=authors)
+    if recipes_limit is not None:
+        ranked = recipes.annotate(
+            author_position=Window(
+                expression=RowNumber(),
+                partition_by=[F('author')],
+                order_by=[F('created').desc(), F('id').desc()],
+            ),
+        ).order_by().values('id', 'author_position')
+        sql, params = ranked.query.sql_with_params()
+        recipes = Recipe.objects.filter(
+            id__in=RawSQL(
+                f'SELECT id FROM ({sql}) ranked WHERE author_position <= %s',
+                (*params, recipes_limit),
+            ),
+        )
+    return recipes.only(
+        'id',
+        'name',
+        'image',
+        'image_variants_ready',
+        'cooking_time',
+        'author_id',
     )
 
-    if recipes_limit is not None and recipes_limit.isdigit():
-        all_recipes_by_author = all_recipes_by_author[:int(recipes_limit)]
 
-    recipes_count = all_recipes_by_author.count()
-    recipes_srlz = RecipeSerializer(
-        all_recipes_by_author,
+def subscriptions_context(request, authors, recipes_limit):
+    recipes_limit = parse_recipes_limit(recipes_limit)
+    recipes_by_author = defaultdict(list)
+    for recipe in latest_recipes_by_authors(authors, recipes_limit):
+        recipes_by_author[recipe.author_id].append(recipe)
+    authors_srlz = ModifiedDjoserUserSerializer(
+        authors,
         context={'request': request},
         many=True,
     )
-    context = author_srlz.data
-    context['recipes'] = recipes_srlz.data
-    context['recipes_count'] = recipes_count
+    context = []
+    for author, author_data in zip(authors, authors_srlz.data):
+        author_data['recipes'] = ShortRecipeReadOnlySerializer(
+            recipes_by_author[author.id],
+            context={'request': request},
+            many=True,
+        ).data
+        context.append(author_data)
     return context
+
+
+def subscribe_context(request, author, recipes_limit):
+    # Счётчики автора перечитываются: подписка только что их изменила.
+    author = User.objects.get(pk=author.pk)
+    return subscriptions_context(request, [author], recipes_limit)[0]
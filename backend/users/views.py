@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -7,19 +8,25 @@ from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from config.pagination import ModifiedPageNumberPagination  # isort: skip
+from config.pagination import IdPagination  # isort: skip
+from recipes.bulk import bulk_members_response  # isort: skip
+from recipes.memberships import FOLLOWING  # isort: skip
 from .models import Follow  # isort: skip
 from .serializers import ModifiedDjoserUserSerializer  # isort: skip
-from .utils import subscribe_context  # isort: skip
+from .utils import (  # isort: skip
+    subscribe_context, subscribed_authors, subscriptions_context)
 
 
 User = get_user_model()
 
 
 class ModifiedDjoserUserViewSet(UserViewSet):
-    pagination_class = ModifiedPageNumberPagination
+    pagination_class = IdPagination
     serializer_class = ModifiedDjoserUserSerializer
 
+    def get_queryset(self):
+        return super().get_queryset().order_by('id')
+
     @action(
         detail=True,
         methods=['GET', 'DELETE', ],
@@ -27,71 +34,75 @@ class ModifiedDjoserUserViewSet(UserViewSet):
     )
     def subscribe(self, request, id):
         user = request.user
-        author = get_object_or_404(
-            User,
-            pk=id,
-        )
-        if user != author:
-            if request.method == 'GET':
-                instance, created = Follow.objects.get_or_create(
-                    user=user,
-                    author=author,
-                )
-                if created:
-                    recipes_limit = request.query_params.get('recipes_limit')
-                    context = subscribe_context(request, author, recipes_limit)
-                    return Response(
-                        context,
-                        status=status.HTTP_201_CREATED,
-                    )
-                else:
-                    return Response(
-                        {'message': 'Подписка уже была оформлена.'},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-            else:
-                subscription = Follow.objects.filter(
-                    user=user,
-                    author=author,
-                )
-                if subscription.exists():
-                    subscription.delete()
-                    return Response(
-                        {'message': 'Подписка отменена.'},
-                        status=status.HTTP_204_NO_CONTENT,
-                    )
-                else:
-                    return Response(
-                        {
-                            'message': (
-                                'Нельзя отменить несуществующую подписку.'
-                            )
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-        else:
+        if str(user.pk) == str(id):
             return Response(
                 {'message': 'Подписаться/отписаться на самого себя нельзя.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if request.method == 'GET':
+            author = get_object_or_404(
+                User,
+                pk=id,
+            )
+            try:
+                with transaction.atomic():
+                    Follow.objects.create(
+                        user=user,
+                        author=author,
+                    )
+            except IntegrityError:
+                return Response(
+                    {'message': 'Подписка уже была оформлена.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            recipes_limit = request.query_params.get('recipes_limit')
+            context = subscribe_context(request, author, recipes_limit)
+            return Response(
+                context,
+                status=status.HTTP_201_CREATED,
+            )
+        deleted, _ = Follow.objects.filter(
+            user=user,
+            author_id=id,
+        ).delete()
+        if deleted:
+            return Response(
+                {'message': 'Подписка отменена.'},
+                status=status.HTTP_204_NO_CONTENT,
+            )
+        get_object_or_404(
+            User,
+            pk=id,
+        )
+        return Response(
+            {
+                'message': (
+                    'Нельзя отменить несуществующую подписку.'
+                )
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE', ],
+        permission_classes=[IsAuthenticated, ],
+        url_path='bulk/subscribe',
+    )
+    def bulk_subscribe(self, request):
+        return bulk_members_response(request, FOLLOWING)
 
 
 class SubscriptionsView(ListAPIView):
-    pagination_class = ModifiedPageNumberPagination
+    pagination_class = IdPagination
     permission_classes = [
         IsAuthenticated,
     ]
 
     def get(self, request):
         user = self.request.user
-        list_of_authors = User.objects.filter(followers__user=user)
+        list_of_authors = subscribed_authors(user)
         page = self.paginate_queryset(list_of_authors)
         recipes_limit = request.query_params.get('recipes_limit')
-        context = [
-            subscribe_context(
-                request,
-                author,
-                recipes_limit,
-            ) for author in page
-        ]
+        context = subscriptions_context(request, page, recipes_limit)
         return self.get_paginated_response(context)